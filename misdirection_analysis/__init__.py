@@ -1,8 +1,10 @@
 from .data import load_tracking_raw
 from .data import load_tracking_adjusted
+from .data import load_play_tensor
 from .data import get_postion_groups
 from .motion_detection import append_motion_event
 from .data_setup import setup
 from .separation import append_separation_probability
 from .premotion_classify import append_premotion_classification
+from .premotion_classify import load_player_play
 from .data_setup import setup_clean
@@ -1,5 +1,14 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+import functools
+import hashlib
+import json
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 import os
+import shutil
 import tqdm
 import numpy as np
 
@@ -12,44 +21,291 @@ import numpy as np
 #   | ease of use in the directory "data/parqs/"
 #   | -- Ensure the directory exists on first run --
 #   | use load_tracking() to get tracking data by gid and pid
+#   |
+#   | Tracking data is stored as a hive partitioned dataset:
+#   |     data/parqs/tracking-raw/week=1/gameId=2022090800/part-0.parq
+#   | gameId and week live in the directory names, not in the files
 
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "../data/")
 _PARQ_DIR = os.path.join(os.path.dirname(__file__), "../data/parqs/")
 
 
-def tracking_raw_path(gid: int) -> str:
-    return os.path.join(_PARQ_DIR, f"tracking-{gid}.parq")
+def _tracking_dataset_dir(name: str) -> str:
+    return os.path.join(_PARQ_DIR, f"tracking-{name}")
 
 
-def _create_tracking_week_raw(week: int):
-    week_df = pd.read_csv(os.path.join(DATA_DIR, f"tracking_week_{week}.csv"))
-    gids = week_df["gameId"].unique()
-    for gid in gids:
-        game_df: pd.DataFrame = week_df[week_df["gameId"] == gid]
-        path = tracking_raw_path(gid)
-        game_df.to_parquet(path)
+@functools.cache
+def _game_weeks() -> dict[int, int]:
+    games = load_reference("games")
+    return dict(zip(games["gameId"], games["week"]))
 
 
-def _create_tracking_raw(force_calcs: bool = False):
-    path = tracking_raw_path(2022090800)
-    if not force_calcs and os.path.exists(path):
-        return
-    for week in tqdm.tqdm(range(1, 10), desc="Creating parquet game files"):
+def _tracking_path(name: str, gid: int, week: int | None = None) -> str:
+    if week is None:
+        week = _game_weeks()[gid]
+    return os.path.join(
+        _tracking_dataset_dir(name), f"week={week}", f"gameId={gid}", "part-0.parq"
+    )
+
+
+def _read_tracking(
+    path: str,
+    gid: int,
+    play_ids: list[int] | None = None,
+    columns: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Read a game's tracking file, only decoding the requested columns and the row groups of the requested plays.
+    """
+    # gameId is a partition key and is not stored in the file
+    file_columns = None
+    if columns is not None:
+        file_columns = [column for column in columns if column != "gameId"]
+    filters = None
+    if play_ids is not None:
+        filters = [("playId", "in", [int(pid) for pid in play_ids])]
+    df = pd.read_parquet(path, columns=file_columns, filters=filters)
+    if columns is None or "gameId" in columns:
+        df.insert(0, "gameId", gid)
+    if columns is not None:
+        df = df[columns]
+    return df
+
+
+def _write_tracking_table(table: pa.Table, path: str):
+    """
+    Write a game's tracking table sorted by play, player and frame with one parquet row group per play.
+    """
+    table = table.sort_by(
+        [("playId", "ascending"), ("nflId", "ascending"), ("frameId", "ascending")]
+    )
+
+    # row group boundaries are the rows where the play changes
+    play_ids = table["playId"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, play_ids[1:] != play_ids[:-1]])
+    stops = np.r_[starts[1:], len(play_ids)]
+
+    # write to a temporary file first so a crash never leaves a partially written game
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with pq.ParquetWriter(tmp_path, table.schema) as writer:
+        for start, stop in zip(starts, stops):
+            writer.write_table(table.slice(start, stop - start))
+    os.replace(tmp_path, path)
+
+
+def _write_tracking(tracking: pd.DataFrame, path: str):
+    """
+    Write a game's tracking sorted by play, player and frame with one parquet row group per play.
+    """
+    tracking = tracking.drop(columns=["gameId"], errors="ignore")
+    _write_tracking_table(pa.Table.from_pandas(tracking, preserve_index=False), path)
+
+
+def tracking_raw_path(gid: int, week: int | None = None) -> str:
+    return _tracking_path("raw", gid, week)
+
+
+# number of csv rows held in memory at once while partitioning a week by game
+CSV_CHUNK_SIZE = 500_000
+
+# explicit schema so every chunk (and every game file) is written with the same types,
+# even when a chunk happens to contain no football rows or no events
+#       - gameId is left out since it is the partition key
+_TRACKING_RAW_SCHEMA = pa.schema(
+    [
+        ("playId", pa.int64()),
+        ("nflId", pa.float64()),
+        ("displayName", pa.string()),
+        ("frameId", pa.int64()),
+        ("frameType", pa.string()),
+        ("time", pa.string()),
+        ("jerseyNumber", pa.float64()),
+        ("club", pa.string()),
+        ("playDirection", pa.string()),
+        ("x", pa.float64()),
+        ("y", pa.float64()),
+        ("s", pa.float64()),
+        ("a", pa.float64()),
+        ("dis", pa.float64()),
+        ("o", pa.float64()),
+        ("dir", pa.float64()),
+        ("event", pa.string()),
+    ]
+)
+# columns pandas would otherwise infer differently depending on the rows in a chunk
+_TRACKING_RAW_DTYPES = {
+    "nflId": "float64",
+    "jerseyNumber": "float64",
+    "o": "float64",
+    "dir": "float64",
+    "event": "object",
+}
+
+
+def _create_tracking_week_raw(week: int, chunksize: int = CSV_CHUNK_SIZE):
+    """
+    Stream the week's tracking csv in chunks and append each chunk's rows to a parquet writer per game.
+
+    The csv is only read once and at most `chunksize` rows are held in memory at a time. The games are
+    streamed to temporary files, and once the whole week is read each game is sorted and written like
+    the adjusted files (one row group per play), so an interrupted week never leaves partially written games.
+    """
+    csv_path = os.path.join(DATA_DIR, f"tracking_week_{week}.csv")
+    writers: dict[int, pq.ParquetWriter] = {}
+    finished = False
+    try:
+        for chunk in pd.read_csv(
+            csv_path, chunksize=chunksize, dtype=_TRACKING_RAW_DTYPES
+        ):
+            # partition the chunk by game in a single pass
+            for gid, game_df in chunk.groupby("gameId", sort=False):
+                if gid not in writers:
+                    path = tracking_raw_path(gid, week)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    writers[gid] = pq.ParquetWriter(
+                        f"{path}.stream", _TRACKING_RAW_SCHEMA
+                    )
+                table = pa.Table.from_pandas(
+                    game_df, schema=_TRACKING_RAW_SCHEMA, preserve_index=False
+                )
+                writers[gid].write_table(table)
+        finished = True
+    finally:
+        for writer in writers.values():
+            writer.close()
+        for gid in writers:
+            path = tracking_raw_path(gid, week)
+            if finished:
+                _write_tracking_table(pq.read_table(f"{path}.stream"), path)
+            os.remove(f"{path}.stream")
+
+
+def _create_tracking_raw(force_calcs: bool = False, weeks: list[int] | None = None):
+    if weeks is None:
+        weeks = range(1, 10)
+
+    # only the weeks with a game missing its file are created (all of them if forced)
+    if not force_calcs:
+        games = load_reference("games")
+        missing = [
+            not os.path.exists(tracking_raw_path(gid, week))
+            for gid, week in zip(games["gameId"], games["week"])
+        ]
+        missing_weeks = set(games.loc[missing, "week"])
+        weeks = [week for week in weeks if week in missing_weeks]
+        if len(weeks) == 0:
+            return
+    for week in tqdm.tqdm(weeks, desc="Creating parquet game files"):
         _create_tracking_week_raw(week)
 
 
-def load_tracking_raw(gid: int) -> pd.DataFrame:
+def load_tracking_raw(
+    gid: int, play_ids: list[int] | None = None, columns: list[str] | None = None
+) -> pd.DataFrame:
     """
     Load tracking data for the game ID given. Stores data in parquet form in the parqs directory. Much faster IO than CSV storage.
+
+    Pass `play_ids` and/or `columns` to only read those plays and columns from disk.
     """
     path = tracking_raw_path(gid)
     if not os.path.exists(path):
         _create_tracking_raw()
-    df = pd.read_parquet(path)
+    df = _read_tracking(path, gid, play_ids, columns)
     return df
 
 
+# ================ #
+# Reference Tables #
+# ================ #
+
+#   | games.csv, plays.csv, players.csv and player_play.csv are read by every
+#   | stage. Each is converted to parquet once (again if the csv changes) and
+#   | memoized in the process, so a pipeline run parses each csv once.
+#   | Stray "Unnamed" index columns written by older pandas round-trips are dropped.
+
+# key columns of each reference table
+_REFERENCE_KEYS = {
+    "games": ["gameId"],
+    "plays": ["gameId", "playId"],
+    "players": ["nflId"],
+    "player_play": ["gameId", "playId", "nflId"],
+}
+
+
+def _reference_path(name: str) -> str:
+    return os.path.join(_PARQ_DIR, f"reference-{name}.parq")
+
+
+@functools.cache
+def _reference_table(name: str) -> pd.DataFrame:
+    if name not in _REFERENCE_KEYS:
+        raise ValueError(f"Unknown reference table: {name}")
+
+    csv_path = os.path.join(DATA_DIR, f"{name}.csv")
+    path = _reference_path(name)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(csv_path):
+        return pd.read_parquet(path)
+
+    table = pd.read_csv(csv_path)
+    table = table.drop(columns=[c for c in table.columns if c.startswith("Unnamed")])
+
+    # write to a process specific temporary file so parallel workers do not collide
+    os.makedirs(_PARQ_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    table.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+    return table
+
+
+@functools.cache
+def _reference_rows(name: str, n_keys: int) -> dict[tuple, np.ndarray]:
+    """
+    Get the row positions of each group of the table's first `n_keys` key columns.
+    """
+    keys = _REFERENCE_KEYS[name][:n_keys]
+    groups = _reference_table(name).groupby(keys, sort=False).indices
+    return {
+        key if isinstance(key, tuple) else (key,): rows for key, rows in groups.items()
+    }
+
+
+@functools.cache
+def _reference_index(name: str) -> pd.MultiIndex:
+    return pd.MultiIndex.from_frame(_reference_table(name)[_REFERENCE_KEYS[name]])
+
+
+def load_reference(
+    name: str,
+    gid: int | None = None,
+    pid: int | None = None,
+    indexed: bool = False,
+) -> pd.DataFrame:
+    """
+    Load a reference table ("games", "plays", "players" or "player_play") as a copy the caller may modify.
+
+    Pass `gid` (and `pid`) to only get the rows of that game (and play), found through a pre-built index.
+    Pass `indexed = True` to index the rows by the table's keys, e.g. (gameId, playId, nflId) for "player_play".
+    """
+    table = _reference_table(name)
+    index = _reference_index(name) if indexed else None
+
+    if gid is not None:
+        key = (gid,) if pid is None else (gid, pid)
+        rows = _reference_rows(name, len(key)).get(key, np.array([], dtype=int))
+        table = table.iloc[rows]
+        index = index[rows] if indexed else None
+    else:
+        table = table.copy()
+
+    if indexed:
+        table = table.drop(columns=_REFERENCE_KEYS[name])
+        table.index = index
+    return table
+
+
 # ============= #
 # Data Cleaning #
 # ============= #
@@ -104,42 +360,68 @@ def get_postion_groups(players: pd.DataFrame) -> pd.DataFrame:
 def _clean_coords(tracking: pd.DataFrame, plays: pd.DataFrame) -> pd.DataFrame:
     """
     Adjusts the coordinates of the players to be relative to the line of scrimmage
+
+    The columns of `tracking` (a single game) are modified in place. Plays without a line of
+    scrimmage in `plays` or without a football position at the snap are dropped.
     """
-    # adjust x relative to line of scrimmage
-    tracking = pd.merge(
-        tracking,
-        plays[["gameId", "playId", "absoluteYardlineNumber"]],
-        on=["gameId", "playId"],
-    )
-    tracking["x"] -= tracking["absoluteYardlineNumber"]
-    tracking.drop(columns=["absoluteYardlineNumber"])
+    # per play offsets: the line of scrimmage and the football's y at the snap
+    #       - the first snap row is used if the football has several for a play
+    game_plays = plays[plays["gameId"].isin(tracking["gameId"].unique())]
+    line_of_scrimmage = game_plays.set_index("playId")["absoluteYardlineNumber"]
+    line_of_scrimmage = line_of_scrimmage.dropna()
+
+    # a play with several lines of scrimmage cannot be mapped onto its rows
+    duplicated = line_of_scrimmage.index.duplicated()
+    if duplicated.any():
+        raise ValueError(
+            f"The plays table has more than one row for the plays {sorted(set(line_of_scrimmage.index[duplicated]))}"
+        )
 
-    # adjust y relative to footballs position
-    football_mask = (tracking["displayName"] == "football") & (
-        (tracking["event"] == "ball_snap") | (tracking["event"] == "snap_direct")
+    football_mask = (tracking["displayName"] == "football") & tracking["event"].isin(
+        ["ball_snap", "snap_direct"]
     )
-    tracking = pd.merge(
-        tracking,
-        tracking.loc[football_mask, ["playId", "y"]].rename(
-            {"y": "football_y"}, axis="columns"
-        ),
-        on="playId",
+    football_y = (
+        tracking.loc[football_mask, ["playId", "y"]]
+        .drop_duplicates("playId")
+        .set_index("playId")["y"]
+        .dropna()
+    )
+
+    # drop the plays missing an offset
+    keep = tracking["playId"].isin(line_of_scrimmage.index) & tracking["playId"].isin(
+        football_y.index
     )
-    tracking["y"] = tracking["football_y"] - tracking["y"]
-    tracking.drop(columns=["football_y"])
-
-    # correct player orientation and direction
-    tracking["o"] = (tracking["o"] + 270) % 360
-    tracking["dir"] = (tracking["dir"] + 270) % 360
-
-    # flip the x and y coordinate and adjust orientation if the play direction is left
-    direction_mask = tracking["playDirection"] == "left"
-    tracking.loc[direction_mask, "x"] *= -1
-    tracking.loc[direction_mask, "y"] *= -1
-    tracking.loc[direction_mask, "o"] = (tracking.loc[direction_mask, "o"] + 180) % 360
-    tracking.loc[direction_mask, "dir"] = (
-        tracking.loc[direction_mask, "dir"] + 180
-    ) % 360
+    if not keep.all():
+        tracking = tracking[keep].reset_index(drop=True)
+
+    # map the play offsets onto the rows
+    play_index, play_ids = pd.factorize(tracking["playId"])
+    row_line_of_scrimmage = line_of_scrimmage.reindex(play_ids).to_numpy(float)[
+        play_index
+    ]
+    row_football_y = football_y.reindex(play_ids).to_numpy(float)[play_index]
+
+    # adjust x relative to line of scrimmage and y relative to footballs position
+    x = tracking["x"].to_numpy(float, copy=True)
+    x -= row_line_of_scrimmage
+    y = tracking["y"].to_numpy(float, copy=True)
+    np.subtract(row_football_y, y, out=y)
+
+    # flip the x and y coordinate if the play direction is left
+    left = (tracking["playDirection"] == "left").to_numpy()
+    np.negative(x, out=x, where=left)
+    np.negative(y, out=y, where=left)
+    tracking["x"] = x
+    tracking["y"] = y
+
+    # correct player orientation and direction (and adjust them if the play direction is left)
+    for column in ["o", "dir"]:
+        angle = tracking[column].to_numpy(float, copy=True)
+        angle += 270
+        np.mod(angle, 360, out=angle)
+        np.add(angle, 180, out=angle, where=left)
+        np.mod(angle, 360, out=angle, where=left)
+        tracking[column] = angle
 
     # flip coordinates to (x, y) instead of (y, x)
     tracking = tracking.rename({"x": "y", "y": "x"}, axis="columns")
@@ -152,49 +434,133 @@ def _clean_coords(tracking: pd.DataFrame, plays: pd.DataFrame) -> pd.DataFrame:
 # ================== #
 
 
-def _compute_orien_vec(tracking: pd.DataFrame) -> pd.DataFrame:
+# rows computed at once by the heading vector kernel (bounds its float64 temporaries)
+_HEADING_CHUNK_SIZE = 65_536
+
+
+def _compute_heading_vecs(tracking: pd.DataFrame) -> pd.DataFrame:
     """
-    Compute the orientation vector for a player play
+    Compute the orientation vector (from `o`) and velocity vector (from `dir` and `s`) of every row
+
+    Both are computed in one pass over chunks of rows and written into preallocated float32 columns,
+    so no intermediate columns are created.
     """
-    tracking["o_x"] = np.sin(np.radians(tracking["o"]))
-    tracking["o_y"] = np.cos(np.radians(tracking["o"]))
+    n_rows = len(tracking)
+    speed = tracking["s"].to_numpy(float)
+    headings = [
+        (tracking["o"].to_numpy(float), None, "o_x", "o_y"),
+        (tracking["dir"].to_numpy(float), speed, "v_x", "v_y"),
+    ]
+    vectors = {
+        name: np.empty(n_rows, dtype=np.float32)
+        for _, _, x_name, y_name in headings
+        for name in [x_name, y_name]
+    }
+
+    radians = np.empty(min(n_rows, _HEADING_CHUNK_SIZE))
+    component = np.empty_like(radians)
+    for start in range(0, n_rows, _HEADING_CHUNK_SIZE):
+        rows = slice(start, min(start + _HEADING_CHUNK_SIZE, n_rows))
+        n = rows.stop - rows.start
+        for degrees, scale, x_name, y_name in headings:
+            np.radians(degrees[rows], out=radians[:n])
+            for trig, name in [(np.sin, x_name), (np.cos, y_name)]:
+                trig(radians[:n], out=component[:n])
+                if scale is not None:
+                    component[:n] *= scale[rows]
+                vectors[name][rows] = component[:n]
+
+    # wrapped in series so pandas uses the arrays as the columns rather than copying them
+    for name, values in vectors.items():
+        tracking[name] = pd.Series(values, index=tracking.index, copy=False)
     return tracking
 
 
-def _compute_velo_vec(tracking: pd.DataFrame) -> pd.DataFrame:
+# seconds between two tracking frames
+FRAME_SECONDS = 0.1
+
+
+def _block_difference(
+    values: np.ndarray, new_block: np.ndarray, dtype: type = np.float64
+) -> np.ndarray:
     """
-    Compute the velocity vector for a player play
+    Get the next row's value minus the previous row's value within each block of rows
+    (`new_block` marks the first row of each) as `dtype`. A row's own value is used in place of a
+    neighbour outside its block.
     """
-    tracking["d_x"] = np.sin(np.radians(tracking["dir"]))
-    tracking["d_y"] = np.cos(np.radians(tracking["dir"]))
-    tracking["v_x"] = tracking["d_x"] * tracking["s"]
-    tracking["v_y"] = tracking["d_y"] * tracking["s"]
-    tracking.drop(columns=["d_x", "d_y"])
-    return tracking
+    end_block = np.append(new_block[1:], True)
+
+    # the next row's value (the row's own value at the end of a block)
+    difference = values.astype(dtype)
+    np.copyto(difference[:-1], values[1:], where=~end_block[:-1])
+
+    # minus the previous row's value (the row's own value at the start of a block)
+    np.subtract(difference[1:], values[:-1], out=difference[1:], where=~new_block[1:])
+    np.subtract(difference, values, out=difference, where=new_block)
+    return difference
+
+
+def _step_seconds(frame_ids: np.ndarray, new_block: np.ndarray) -> np.ndarray:
+    """
+    Get the time between the neighbouring rows a time derivative uses for each row
+    (0 for blocks of a single row).
+
+    The rows must be sorted by frameId within each block, and `new_block` marks the first row of each.
+    """
+    frame_steps = _block_difference(frame_ids, new_block, np.int32)
+    single_row = new_block & np.append(new_block[1:], True)
+    if (frame_steps[~single_row] <= 0).any():
+        raise ValueError("Tracking rows must be sorted by playId, nflId, frameId")
+    return frame_steps * FRAME_SECONDS
+
+
+def _time_derivative(
+    values: np.ndarray, step_seconds: np.ndarray, new_block: np.ndarray
+) -> np.ndarray:
+    """
+    Differentiate the values over time within each block of rows (a player play).
+
+    Uses a central difference inside a block and a one-sided difference at its first and last frame,
+    divided by the actual time between the frames used (so missing frames are accounted for).
+    Blocks of a single frame are NaN.
+    """
+    derivative = _block_difference(values, new_block)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        derivative /= step_seconds
+    derivative[step_seconds == 0] = np.nan
+    return derivative
 
 
 def _compute_accel_vec(tracking: pd.DataFrame) -> pd.DataFrame:
     """
-    Compute the acceleration vector for a player play
+    Compute the acceleration and jerk vectors of each player play from the velocity vectors
+
+    The rows must be sorted by playId, nflId, frameId (as the tracking files are).
     """
-    # compute the acceleration vector
-    tracking["a_x"] = (tracking["v_x"].shift(-1) - tracking["v_x"].shift(1)) / 0.2
-    tracking["a_y"] = (tracking["v_y"].shift(-1) - tracking["v_y"].shift(1)) / 0.2
+    # every player play is differentiated separately, so its rows must be contiguous
+    _, new_player = _block_changes(tracking)
+    n_player_plays = tracking.groupby(["playId", "nflId"], dropna=False).ngroups
+    if len(tracking) > 0 and new_player.sum() != n_player_plays:
+        raise ValueError("Tracking rows must be sorted by playId, nflId, frameId")
+    step_seconds = _step_seconds(tracking["frameId"].to_numpy(), new_player)
 
-    # adjust for edge case frames (ID = 1 or 200)
-    id1 = tracking["frameId"] == 1
-    tracking.loc[id1, "a_x"] = tracking["a_x"].shift(-1)
-    tracking.loc[id1, "a_y"] = tracking["a_y"].shift(-1)
-    id200 = tracking["frameId"] == 200
-    tracking.loc[id200, "a_x"] = tracking["a_x"].shift(1)
-    tracking.loc[id200, "a_y"] = tracking["a_y"].shift(1)
+    # one component at a time so only a column's float64 temporaries are held at once
+    vectors = {}
+    for axis in ["x", "y"]:
+        acceleration = _time_derivative(
+            tracking[f"v_{axis}"].to_numpy(), step_seconds, new_player
+        )
+        jerk = _time_derivative(acceleration, step_seconds, new_player)
+        vectors[f"a_{axis}"] = acceleration.astype(np.float32)
+        vectors[f"j_{axis}"] = jerk.astype(np.float32)
 
+    for name in ["a_x", "a_y", "j_x", "j_y"]:
+        tracking[name] = pd.Series(vectors[name], index=tracking.index, copy=False)
     return tracking
 
 
 def _compute_vectors(tracking: pd.DataFrame) -> pd.DataFrame:
-    tracking = _compute_orien_vec(tracking)
-    tracking = _compute_velo_vec(tracking)
+    tracking = _compute_heading_vecs(tracking)
     tracking = _compute_accel_vec(tracking)
     return tracking
 
@@ -205,47 +571,755 @@ def _compute_vectors(tracking: pd.DataFrame) -> pd.DataFrame:
 
 
 def tracking_adjusted_path(gid: int) -> str:
-    return os.path.join(_PARQ_DIR, f"tracking-adjusted-{gid}.parq")
+    return _tracking_path("adjusted", gid)
+
 
+def _write_tracking_adjusted(tracking: pd.DataFrame, gid: int):
+    _write_tracking(tracking, tracking_adjusted_path(gid))
 
-def _create_tracking_adjusted_game(gid: int, plays: pd.DataFrame):
+
+def _tracking_adjusted_memory_path() -> str:
+    return os.path.join(_PARQ_DIR, "tracking-adjusted-memory.csv")
+
+
+# raw columns which are replaced by the vectors and not kept in the adjusted data
+_TRACKING_ADJUSTED_DROPPED = ["s", "a", "dis", "o", "dir"]
+
+# types of the adjusted tracking columns
+#       - strings are categoricals (dictionary encoded in the parquet files)
+#       - nflId stays float64 since the football has no nflId (NaN)
+_TRACKING_ADJUSTED_DTYPES = {
+    "playId": "int32",
+    "nflId": "float64",
+    "displayName": "category",
+    "frameId": "int16",
+    "frameType": "category",
+    "time": "category",
+    "jerseyNumber": "float32",
+    "club": "category",
+    "playDirection": "category",
+    "x": "float32",
+    "y": "float32",
+    "event": "category",
+    "o_x": "float32",
+    "o_y": "float32",
+    "v_x": "float32",
+    "v_y": "float32",
+    "a_x": "float32",
+    "a_y": "float32",
+    "j_x": "float32",
+    "j_y": "float32",
+}
+
+
+def _compact_tracking(tracking: pd.DataFrame) -> pd.DataFrame:
+    """
+    Drop the columns the adjusted data does not keep and convert the rest to their compact types.
+    """
+    tracking = tracking.drop(columns=_TRACKING_ADJUSTED_DROPPED)
+    return tracking.astype(
+        {
+            column: dtype
+            for column, dtype in _TRACKING_ADJUSTED_DTYPES.items()
+            if column in tracking.columns
+        }
+    )
+
+
+def _create_tracking_adjusted_game(gid: int, plays: pd.DataFrame) -> tuple[int, int]:
+    """
+    Create the adjusted tracking file of a game.
+
+    Returns the memory used by the game's tracking before and after the columns are compacted (in bytes).
+    """
     # load in the tracking data
     tracking_path = tracking_raw_path(gid)
     if not os.path.exists(tracking_path):
         _create_tracking_raw()
-    tracking = pd.read_parquet(tracking_path)
+    tracking = _read_tracking(tracking_path, gid)
 
     # clean the coordinates
     tracking = _clean_coords(tracking, plays)
 
+    # the vectors are differentiated over each player play's frames in row order
+    tracking = tracking.sort_values(FRAME_KEYS, kind="stable", ignore_index=True)
+
     # compute the vectors for every player for every play
     tracking = _compute_vectors(tracking)
 
-    # drop unnecessary columns
-    tracking.drop(columns=["o", "s", "a", "dir"])
+    # drop unnecessary columns and compact the types
+    memory_before = tracking.memory_usage(deep=True).sum()
+    tracking = _compact_tracking(tracking)
+    memory_after = tracking.memory_usage(deep=True).sum()
 
     # write the adjusted tracking data
-    adjusted_tracking_path = tracking_adjusted_path(gid)
-    tracking.to_parquet(adjusted_tracking_path)
+    _write_tracking_adjusted(tracking, gid)
+
+    # anything derived from the old file is stale, so those stages must run again
+    _remove_sidecars(gid)
+    _clear_markers(gid)
+
+    return int(memory_before), int(memory_after)
+
 
+# plays table set once per worker process by the pool initializer
+_worker_plays: pd.DataFrame | None = None
 
-def _create_tracking_adjusted(force_calcs: bool = False):
-    path = tracking_adjusted_path(2022090800)
-    if not force_calcs and os.path.exists(path):
+
+def _init_adjusted_worker(plays: pd.DataFrame):
+    global _worker_plays
+    _worker_plays = plays
+
+
+def _create_tracking_adjusted_worker(gid: int) -> tuple[int, int, int]:
+    return gid, *_create_tracking_adjusted_game(gid, _worker_plays)
+
+
+def _report_tracking_adjusted_memory(memory: list[tuple[int, int, int]]):
+    """
+    Save the memory footprint of each game's tracking before and after compaction and print the total.
+    """
+    report = pd.DataFrame(memory, columns=["gameId", "bytes_before", "bytes_after"])
+
+    # keep the games of earlier runs which were not rebuilt
+    path = _tracking_adjusted_memory_path()
+    if os.path.exists(path):
+        previous = pd.read_csv(path)
+        previous = previous[~previous["gameId"].isin(report["gameId"])]
+        report = pd.concat([previous, report], ignore_index=True)
+    report = report.sort_values("gameId", ignore_index=True)
+    report.to_csv(path, index=False)
+
+    built = report[report["gameId"].isin([gid for gid, _, _ in memory])]
+    before = built["bytes_before"].sum() / 2**20
+    after = built["bytes_after"].sum() / 2**20
+    print(
+        f"Adjusted tracking memory of {len(built)} game(s): {before:.1f} MB -> {after:.1f} MB"
+    )
+
+
+def _create_tracking_adjusted(
+    force_calcs: bool = False,
+    workers: int | None = None,
+    gids: list[int] | None = None,
+):
+    """
+    Create the adjusted tracking file for every game (or only the games in `gids`) which does not have one.
+    Pass `force_calcs = True` to recreate the files that exist.
+
+    Games are independent, so they are fanned out to `workers` processes (defaults to the CPU count).
+    Pass `workers = 1` to build the files serially in this process.
+    """
+    games = load_reference("games")
+    all_gid = games["gameId"].unique() if gids is None else gids
+
+    # only the games missing their file are created (all of them if forced)
+    if not force_calcs:
+        all_gid = [
+            gid for gid in all_gid if not os.path.exists(tracking_adjusted_path(gid))
+        ]
+        if len(all_gid) == 0:
+            return
+
+    # the raw files must exist before the workers start reading them
+    _create_tracking_raw()
+
+    plays = load_reference("plays")
+    plays = plays[["gameId", "playId", "absoluteYardlineNumber"]]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    memory = []
+    if workers <= 1:
+        for gid in tqdm.tqdm(all_gid, desc="Creating adjusted parquet game files"):
+            memory.append((gid, *_create_tracking_adjusted_game(gid, plays)))
+        _report_tracking_adjusted_memory(memory)
         return
-    games = pd.read_csv(os.path.join(DATA_DIR, "games.csv"))
-    plays = pd.read_csv(os.path.join(DATA_DIR, "plays.csv"))
-    all_gid = games["gameId"].unique()
-    for gid in tqdm.tqdm(all_gid, desc="Creating adjusted parquet game files"):
-        _create_tracking_adjusted_game(gid, plays)
+
+    # the plays table is sent to each worker once rather than pickled with every game
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_adjusted_worker,
+        initargs=(plays,),
+    ) as executor:
+        futures = [
+            executor.submit(_create_tracking_adjusted_worker, gid) for gid in all_gid
+        ]
+        for future in tqdm.tqdm(
+            as_completed(futures),
+            total=len(futures),
+            desc="Creating adjusted parquet game files",
+        ):
+            memory.append(future.result())
+    _report_tracking_adjusted_memory(memory)
 
 
-def load_tracking_adjusted(gid: int) -> pd.DataFrame:
+def load_tracking_adjusted(
+    gid: int,
+    play_ids: list[int] | None = None,
+    columns: list[str] | None = None,
+    sidecars: list[str] | None = None,
+) -> pd.DataFrame:
     """
     Load tracking data for the game ID given. Stores data in parquet form in the parqs directory. Much faster IO than CSV storage.
+
+    Pass `play_ids` and/or `columns` to only read those plays and columns from disk.
+    Pass `sidecars` (e.g. `["motion_event"]`) to join those derived column tables onto the tracking data
+    (a ValueError is raised if two of them, or a sidecar and the tracking data, provide the same column).
+    The rows are sorted by `playId`, `nflId` and `frameId`.
     """
     path = tracking_adjusted_path(gid)
     if not os.path.exists(path):
-        _create_tracking_adjusted()
-    df = pd.read_parquet(path)
+        _create_tracking_adjusted(gids=[gid])
+    if not sidecars:
+        return _read_tracking(path, gid, play_ids, columns)
+
+    # read the frame keys along with the requested tracking columns so the sidecars can be joined
+    read_columns = None
+    if columns is not None:
+        file_columns = pq.read_schema(path).names + ["gameId"]
+        read_columns = [column for column in columns if column in file_columns]
+        read_columns += [key for key in FRAME_KEYS if key not in read_columns]
+    df = _read_tracking(path, gid, play_ids, read_columns)
+
+    for name in sidecars:
+        sidecar = _read_sidecar(name, gid, play_ids)
+
+        # a column loaded twice would be renamed by the merge (e.g. both separation sidecars)
+        repeated = df.columns.intersection(sidecar.columns.difference(FRAME_KEYS))
+        if len(repeated) > 0:
+            raise ValueError(
+                f"The {name} sidecar provides {list(repeated)}, which is already loaded (by the tracking data or another sidecar)"
+            )
+        df = df.merge(sidecar, how="left", on=FRAME_KEYS)
+
+    if columns is not None:
+        df = df[columns]
     return df
+
+
+def tracking_adjusted_dataset() -> ds.Dataset:
+    """
+    Get the adjusted tracking data for every game as a pyarrow dataset partitioned by `week` and `gameId`.
+    """
+    _create_tracking_adjusted()
+    return ds.dataset(_tracking_dataset_dir("adjusted"), partitioning="hive")
+
+
+# ======================= #
+# Derived Column Sidecars #
+# ======================= #
+
+#   | Columns derived by later stages (motion events, separation, ...) are not
+#   | written back into the adjusted tracking files. Each is stored as a narrow
+#   | per-game table keyed by the frame keys, only holding the rows that have a
+#   | value, and joined on demand by load_tracking_adjusted(..., sidecars=[...])
+#   |     data/parqs/tracking-sidecar-motion_event/week=1/gameId=2022090800/part-0.parq
+
+
+# columns which identify a single row of a game's tracking data
+FRAME_KEYS = ["playId", "nflId", "frameId"]
+
+
+def _sidecar_path(name: str, gid: int) -> str:
+    return _tracking_path(f"sidecar-{name}", gid)
+
+
+def _write_sidecar(name: str, gid: int, values: pd.DataFrame):
+    """
+    Write the sidecar table for a game from the frame keys and value columns, dropping rows without a value.
+    """
+    value_columns = [column for column in values.columns if column not in FRAME_KEYS]
+    values = values.dropna(subset=value_columns, how="all")
+    _write_tracking(values[FRAME_KEYS + value_columns], _sidecar_path(name, gid))
+
+
+def _read_sidecar(
+    name: str, gid: int, play_ids: list[int] | None = None
+) -> pd.DataFrame:
+    path = _sidecar_path(name, gid)
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"The {name} sidecar for game {gid} does not exist, run its pipeline stage first"
+        )
+    filters = None
+    if play_ids is not None:
+        filters = [("playId", "in", [int(pid) for pid in play_ids])]
+    return pd.read_parquet(path, filters=filters)
+
+
+def _remove_sidecars(gid: int):
+    """
+    Remove every sidecar table of the game.
+    """
+    prefix = os.path.basename(_tracking_dataset_dir("sidecar-"))
+    if not os.path.exists(_PARQ_DIR):
+        return
+    for directory in os.listdir(_PARQ_DIR):
+        if directory.startswith(prefix):
+            path = _sidecar_path(directory[len(prefix) :], gid)
+            if os.path.exists(path):
+                os.remove(path)
+
+
+# ================== #
+# Completion Markers #
+# ================== #
+
+#   | Per-game stages write a marker once a game is complete. The marker holds
+#   | the hash of the parameters the game was computed with, so a re-run can
+#   | skip completed games and resume after a failure.
+
+
+def _params_key(params: dict) -> str:
+    encoded = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def _marker_path(stage: str, gid: int) -> str:
+    return os.path.join(_PARQ_DIR, "markers", stage, f"{gid}.done")
+
+
+def _write_marker(stage: str, gid: int, key: str):
+    path = _marker_path(stage, gid)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(key)
+
+
+def _has_marker(stage: str, gid: int, key: str) -> bool:
+    path = _marker_path(stage, gid)
+    if not os.path.exists(path):
+        return False
+    with open(path) as f:
+        return f.read() == key
+
+
+def _clear_markers(gid: int, stage: str | None = None):
+    """
+    Remove the game's marker for the stage (or for every stage if None).
+    """
+    markers_dir = os.path.join(_PARQ_DIR, "markers")
+    if stage is not None:
+        stages = [stage]
+    elif os.path.exists(markers_dir):
+        stages = os.listdir(markers_dir)
+    else:
+        stages = []
+    for stage in stages:
+        path = _marker_path(stage, gid)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+# ============== #
+# Tracking Index #
+# ============== #
+
+#   | The tracking files are sorted by playId, nflId, frameId, so every play and
+#   | every player play is a contiguous block of rows. Index those blocks once per
+#   | game instead of scanning the whole game with a mask for every play.
+
+
+@dataclass
+class TrackingIndex:
+    """
+    Row ranges of every play and player play of a game's tracking data.
+
+    `get_play` and `get_player_play` return slices of `tracking` (no rows are copied).
+    The football's rows are indexed under the nflId None.
+    """
+
+    tracking: pd.DataFrame
+    plays: dict[int, slice]
+    player_plays: dict[tuple[int, int | None], slice]
+
+    def play_ids(self) -> list[int]:
+        return list(self.plays)
+
+    def get_play(self, pid: int) -> pd.DataFrame:
+        return self.tracking.iloc[self.plays.get(pid, slice(0, 0))]
+
+    def get_player_play(self, pid: int, nflid: int | None) -> pd.DataFrame:
+        key = (pid, None if nflid is None or np.isnan(nflid) else nflid)
+        return self.tracking.iloc[self.player_plays.get(key, slice(0, 0))]
+
+
+def _block_changes(tracking: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Get whether each row starts a new play and whether it starts a new player play.
+    """
+    pids = tracking["playId"].to_numpy()
+    nflids = tracking["nflId"].to_numpy(dtype=float)
+    new_play = np.concatenate(([True], pids[1:] != pids[:-1]))[: len(pids)]
+    new_player = new_play.copy()
+    new_player[1:] |= (nflids[1:] != nflids[:-1]) & ~(
+        np.isnan(nflids[1:]) & np.isnan(nflids[:-1])
+    )
+    return new_play, new_player
+
+
+def _block_slices(changes: np.ndarray, n_rows: int) -> tuple[np.ndarray, list[slice]]:
+    """
+    Get the first row and the slice of each block of rows, given where a row starts a new block.
+    """
+    starts = np.flatnonzero(changes)
+    stops = np.append(starts[1:], n_rows)
+    return starts, [slice(start, stop) for start, stop in zip(starts, stops)]
+
+
+def index_tracking(tracking: pd.DataFrame) -> TrackingIndex:
+    """
+    Index the plays and player plays of a game's tracking data (as loaded by `load_tracking_adjusted`).
+
+    The rows are sorted by playId, nflId, frameId first if a play or player play is not contiguous.
+    """
+    # every block must be contiguous
+    new_play, new_player = _block_changes(tracking)
+    n_player_plays = tracking.groupby(["playId", "nflId"], dropna=False).ngroups
+    if len(tracking) > 0 and new_player.sum() != n_player_plays:
+        tracking = tracking.sort_values(FRAME_KEYS, kind="stable").reset_index(
+            drop=True
+        )
+        new_play, new_player = _block_changes(tracking)
+
+    n_rows = len(tracking)
+    play_starts, play_slices = _block_slices(new_play, n_rows)
+    player_starts, player_slices = _block_slices(new_player, n_rows)
+
+    pids = tracking["playId"].to_numpy()
+    nflids = tracking["nflId"].to_numpy(dtype=float)
+    plays = {int(pid): rows for pid, rows in zip(pids[play_starts], play_slices)}
+    player_plays = {
+        (int(pid), None if np.isnan(nflid) else nflid): rows
+        for pid, nflid, rows in zip(
+            pids[player_starts], nflids[player_starts], player_slices
+        )
+    }
+
+    return TrackingIndex(tracking, plays, player_plays)
+
+
+# =========== #
+# Play Arrays #
+# =========== #
+
+#   | Pairwise calculations (receiver vs defender, ...) are done on dense
+#   | (frames, players, columns) arrays of a single play rather than on
+#   | per-player slices, so players missing frames line up by frameId
+
+
+def _play_array_index(
+    tracking: pd.DataFrame, nflIds: np.ndarray, frameIds: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Get the frame and player slot of each row of a play (player slot is -1 if not in `nflIds`).
+
+    `frameIds` must be sorted.
+    """
+    frame_index = np.searchsorted(frameIds, tracking["frameId"].values)
+    player_index = pd.Index(nflIds).get_indexer(tracking["nflId"].values)
+    return frame_index, player_index
+
+
+def _play_array(
+    tracking: pd.DataFrame,
+    nflIds: np.ndarray,
+    frameIds: np.ndarray,
+    columns: list[str],
+    dtype: type = np.float64,
+) -> np.ndarray:
+    """
+    Get a `(frames, players, columns)` array of a play's values (NaN where a player has no frame).
+    """
+    values = np.full((len(frameIds), len(nflIds), len(columns)), np.nan, dtype=dtype)
+    frame_index, player_index = _play_array_index(tracking, nflIds, frameIds)
+    mask = player_index >= 0
+    values[frame_index[mask], player_index[mask]] = tracking[columns].values[mask]
+    return values
+
+
+# ============ #
+# Play Tensors #
+# ============ #
+
+#   | A play materialized as one dense (frames, players + ball, columns) array
+#   | with per-slot metadata, so play level computations can be written as
+#   | array operations instead of per-player DataFrame slices
+
+
+# columns of each player slot in a play tensor
+PLAY_TENSOR_COLUMNS = ["x", "y", "v_x", "v_y", "a_x", "a_y", "o_x", "o_y"]
+
+
+@dataclass
+class PlayTensor:
+    """
+    A play as a float32 array of shape `(frames, players, PLAY_TENSOR_COLUMNS)`.
+
+    Players are ordered by nflId with the football last. Frames a player is missing from are NaN.
+    `nfl_ids`, `clubs`, `position_groups` and `is_offense` describe each player slot
+    (the football has nflId NaN, club "football" and no position group).
+    """
+
+    gid: int
+    pid: int
+    values: np.ndarray
+    frame_ids: np.ndarray
+    nfl_ids: np.ndarray
+    clubs: np.ndarray
+    position_groups: np.ndarray
+    is_offense: np.ndarray
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Get a `(frames, players)` view of one of the `PLAY_TENSOR_COLUMNS`.
+        """
+        return self.values[:, :, PLAY_TENSOR_COLUMNS.index(name)]
+
+    def slots(self, nflIds: np.ndarray) -> np.ndarray:
+        """
+        Get the player slot of each nflId (-1 if the player is not in the play).
+        """
+        return pd.Index(self.nfl_ids).get_indexer(nflIds)
+
+    def group_slots(self, position_groups: list[str]) -> np.ndarray:
+        """
+        Get the player slots in any of the position groups.
+        """
+        return np.flatnonzero(np.isin(self.position_groups, position_groups))
+
+
+def _build_play_tensor(
+    gid: int,
+    pid: int,
+    tracking: pd.DataFrame,
+    possession_team: str | None,
+    position_groups: dict[int, str],
+) -> PlayTensor:
+    # one slot per player, ordered by nflId with the football (NaN) last
+    players = tracking[["nflId", "club"]].drop_duplicates("nflId")
+    players = players.sort_values("nflId", na_position="last")
+    nfl_ids = players["nflId"].to_numpy(dtype=float)
+    clubs = players["club"].to_numpy(dtype=object)
+
+    frame_ids = np.sort(tracking["frameId"].unique())
+    values = _play_array(
+        tracking, nfl_ids, frame_ids, PLAY_TENSOR_COLUMNS, dtype=np.float32
+    )
+
+    return PlayTensor(
+        gid=gid,
+        pid=pid,
+        values=values,
+        frame_ids=frame_ids,
+        nfl_ids=nfl_ids,
+        clubs=clubs,
+        position_groups=np.array(
+            [position_groups.get(nflid) for nflid in nfl_ids], dtype=object
+        ),
+        is_offense=clubs == possession_team,
+    )
+
+
+def play_tensors(gid: int, play_ids: list[int] | None = None) -> dict[int, PlayTensor]:
+    """
+    Build the play tensor of every play of a game (or only the plays in `play_ids`), keyed by playId.
+    """
+    plays = load_reference("plays", gid)
+    possession_teams = dict(zip(plays["playId"], plays["possessionTeam"]))
+    players = get_postion_groups(load_reference("players"))
+    position_groups = dict(zip(players["nflId"], players["position_group"]))
+
+    tracking = index_tracking(
+        load_tracking_adjusted(
+            gid,
+            play_ids=play_ids,
+            columns=["playId", "nflId", "frameId", "club"] + PLAY_TENSOR_COLUMNS,
+        )
+    )
+
+    return {
+        pid: _build_play_tensor(
+            gid,
+            pid,
+            tracking.get_play(pid),
+            possession_teams.get(pid),
+            position_groups,
+        )
+        for pid in tracking.play_ids()
+    }
+
+
+def load_play_tensor(gid: int, pid: int) -> PlayTensor:
+    """
+    Build the play tensor of a single play (see `PlayTensor`).
+    """
+    return play_tensors(gid, [pid])[pid]
+
+
+# ============ #
+# Season Store #
+# ============ #
+
+#   | For repeated interactive queries the adjusted tracking of the whole season is
+#   | exported once as one contiguous .npy file per column plus a play offset index
+#   |     data/parqs/season-adjusted/<column>.npy
+#   |     data/parqs/season-adjusted/plays.npy (gameId, playId, start row, stop row)
+#   | The loader memory maps the files, so opening the store reads nothing and any
+#   | play is a slice of the mapped columns (shared between processes by the OS).
+#   | String columns are stored as int32 codes into categories.json (-1 is missing).
+
+# free text columns left out of the season store
+_SEASON_STORE_SKIPPED = ["displayName", "time"]
+
+
+def _season_store_dir() -> str:
+    return os.path.join(_PARQ_DIR, "season-adjusted")
+
+
+def season_store_path() -> str:
+    return os.path.join(_season_store_dir(), "plays.npy")
+
+
+def export_season_store(force_calcs: bool = False, sidecars: list[str] | None = None):
+    """
+    Export the adjusted tracking data of every game to the memory mapped season store.
+
+    Pass `sidecars` to also store those sidecar columns (e.g. `["motion_event"]`).
+    """
+    if not force_calcs and os.path.exists(season_store_path()):
+        return
+
+    gids = load_reference("games")["gameId"].unique()
+    n_rows = [
+        pq.ParquetFile(tracking_adjusted_path(gid)).metadata.num_rows for gid in gids
+    ]
+
+    # build the store in a temporary directory and swap it in when complete
+    store_dir = _season_store_dir()
+    tmp_dir = store_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    arrays = {}
+    categories = {}
+    plays = []
+    offset = 0
+    for gid, n in tqdm.tqdm(
+        zip(gids, n_rows), total=len(gids), desc="Exporting the season store"
+    ):
+        tracking = index_tracking(load_tracking_adjusted(gid, sidecars=sidecars))
+
+        # allocate the season columns from the first game's types
+        if len(arrays) == 0:
+            for name, dtype in tracking.tracking.dtypes.items():
+                if name in _SEASON_STORE_SKIPPED:
+                    continue
+                if not (
+                    pd.api.types.is_numeric_dtype(dtype)
+                    or pd.api.types.is_bool_dtype(dtype)
+                ):
+                    categories[name] = []
+                    dtype = np.int32
+                arrays[name] = np.lib.format.open_memmap(
+                    os.path.join(tmp_dir, f"{name}.npy"),
+                    mode="w+",
+                    dtype=dtype,
+                    shape=(sum(n_rows),),
+                )
+
+        rows = slice(offset, offset + n)
+        for name, array in arrays.items():
+            values = tracking.tracking[name]
+            if name in categories:
+                # extend the categories with this game's new values, then encode
+                known = set(categories[name])
+                categories[name] += [
+                    value for value in values.dropna().unique() if value not in known
+                ]
+                values = pd.Index(categories[name]).get_indexer(values)
+            array[rows] = values
+
+        for pid, play_rows in tracking.plays.items():
+            plays.append((gid, pid, offset + play_rows.start, offset + play_rows.stop))
+        offset += n
+
+    for array in arrays.values():
+        array.flush()
+    with open(os.path.join(tmp_dir, "categories.json"), "w") as f:
+        json.dump(categories, f)
+    np.save(
+        os.path.join(tmp_dir, "plays.npy"),
+        np.array(plays, dtype=np.int64).reshape(-1, 4),
+    )
+
+    shutil.rmtree(store_dir, ignore_errors=True)
+    os.replace(tmp_dir, store_dir)
+
+
+@dataclass
+class SeasonStore:
+    """
+    Memory mapped adjusted tracking data of the whole season (see `load_season_store`).
+
+    `columns` maps each column name to its memory mapped array over every row of the season.
+    `plays` maps (gameId, playId) to the play's row slice.
+    """
+
+    columns: dict[str, np.ndarray]
+    categories: dict[str, list[str]]
+    plays: dict[tuple[int, int], slice]
+
+    def get_play(self, gid: int, pid: int) -> dict[str, np.ndarray]:
+        """
+        Get the play's rows of every column as views into the memory mapped files (no copy).
+        String columns are returned as their codes into `categories`.
+        """
+        rows = self.plays[(gid, pid)]
+        return {name: array[rows] for name, array in self.columns.items()}
+
+    def get_play_frame(
+        self, gid: int, pid: int, columns: list[str] | None = None
+    ) -> pd.DataFrame:
+        """
+        Get the play as a DataFrame (the values are copied and string columns decoded).
+        """
+        rows = self.plays[(gid, pid)]
+        columns = list(self.columns) if columns is None else columns
+        play = {}
+        for name in columns:
+            values = self.columns[name][rows]
+            if name in self.categories:
+                values = pd.Categorical.from_codes(values, self.categories[name])
+            play[name] = values
+        return pd.DataFrame(play)
+
+
+def load_season_store(columns: list[str] | None = None) -> SeasonStore:
+    """
+    Memory map the season store created by `export_season_store` (only `columns` if given).
+    """
+    store_dir = _season_store_dir()
+    with open(os.path.join(store_dir, "categories.json")) as f:
+        categories = json.load(f)
+
+    if columns is None:
+        columns = [
+            name[: -len(".npy")]
+            for name in sorted(os.listdir(store_dir))
+            if name.endswith(".npy") and name != "plays.npy"
+        ]
+    arrays = {
+        name: np.load(os.path.join(store_dir, f"{name}.npy"), mmap_mode="r")
+        for name in columns
+    }
+
+    plays = np.load(season_store_path())
+    play_rows = {
+        (int(gid), int(pid)): slice(int(start), int(stop))
+        for gid, pid, start, stop in plays
+    }
+
+    return SeasonStore(arrays, categories, play_rows)
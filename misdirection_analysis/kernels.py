@@ -0,0 +1,98 @@
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+# ======================= #
+# Compiled Geometry Loops #
+# ======================= #
+
+#   | The receiver vs defender geometry of the separation calculations is done
+#   | on small (frames, receivers, defenders) arrays once per play. When numba
+#   | is installed these loops are compiled (without the GIL, so plays can also
+#   | be run on several threads) and used in place of the NumPy versions in
+#   | separation.py and separation_metric.py. numba is optional: without it (or
+#   | with USE_NUMBA = False) the NumPy versions are used.
+
+
+# use the compiled kernels if numba is installed
+USE_NUMBA = True
+
+
+def numba_enabled() -> bool:
+    """
+    Whether the compiled kernels are used (numba is installed and `USE_NUMBA` is set).
+    """
+    return USE_NUMBA and numba is not None
+
+
+def _jit(function):
+    if numba is None:
+        return function
+    # numpy error model so a division by zero gives inf/NaN like the NumPy versions
+    return numba.njit(nogil=True, cache=True, error_model="numpy")(function)
+
+
+@_jit
+def separation_tensor(receiver_xy: np.ndarray, defender_xy: np.ndarray) -> np.ndarray:
+    """
+    Compiled version of `separation._separation_tensor`.
+    """
+    n_frames, n_receivers, _ = receiver_xy.shape
+    n_defenders = defender_xy.shape[1]
+    separation = np.empty((n_frames, n_receivers, n_defenders))
+    for f in range(n_frames):
+        for r in range(n_receivers):
+            for d in range(n_defenders):
+                diff_x = receiver_xy[f, r, 0] - defender_xy[f, d, 0]
+                diff_y = receiver_xy[f, r, 1] - defender_xy[f, d, 1]
+                separation[f, r, d] = np.sqrt(diff_x**2 + diff_y**2)
+    return separation
+
+
+@_jit
+def separation_metric(
+    receiver: np.ndarray,
+    defender: np.ndarray,
+    pass_speed: float,
+    qb_drop_back: float,
+) -> np.ndarray:
+    """
+    Compiled version of `separation_metric._compute_separation_metric`.
+    """
+    n_frames, n_receivers, _ = receiver.shape
+    n_defenders = defender.shape[1]
+    separation = np.empty((n_frames, n_receivers, n_defenders))
+    for f in range(n_frames):
+        for r in range(n_receivers):
+            rx, ry = receiver[f, r, 0], receiver[f, r, 1]
+            rv_x, rv_y = receiver[f, r, 2], receiver[f, r, 3]
+            ra_x, ra_y = receiver[f, r, 4], receiver[f, r, 5]
+
+            # compute theoretical pass time
+            pass_distance = np.sqrt(rx**2 + (ry - qb_drop_back) ** 2)
+            t_frame = pass_distance / pass_speed
+            t_sec = t_frame / 10
+
+            # exptrapolate x and y
+            x_extrap = rx + rv_x * t_sec + 0.5 * ra_x * t_sec**2
+            y_extrap = ry + rv_y * t_sec + 0.5 * ra_y * t_sec**2
+
+            for d in range(n_defenders):
+                dx, dy = defender[f, d, 0], defender[f, d, 1]
+                dv_x, dv_y = defender[f, d, 2], defender[f, d, 3]
+
+                # vector from defender to receivers extrapolation
+                dir_x = x_extrap - dx
+                dir_y = y_extrap - dy
+                magnitude = np.sqrt(dir_x**2 + dir_y**2)
+                ux = dir_x / magnitude
+                uy = dir_y / magnitude
+
+                # relative velocity divided by the distance squared
+                rvelo = ux * dv_x + uy * dv_y
+                separation[f, r, d] = rvelo / ((rx - dx) ** 2 + (ry - dy) ** 2)
+    return separation
@@ -1,6 +1,5 @@
 from . import data
 import pandas as pd
-import os
 
 
 BOX_X_LEFT = -7
@@ -44,9 +43,9 @@ def get_linebacker_motion_play(tracking: pd.DataFrame):
 
 def get_linebacker_motion():
     # load in the necessary data
-    plays = pd.read_csv(os.path.join(data.DATA_DIR, "plays.csv"))
-    players = pd.read_csv(os.path.join(data.DATA_DIR, "players.csv"))
-    player_play = pd.read_csv(os.path.join(data.DATA_DIR, "player_play.csv"))
+    plays = data.load_reference("plays")
+    players = data.load_reference("players")
+    player_play = data.load_reference("player_play")
 
     # get position groups for players
     players = data.get_postion_groups(players)
@@ -61,16 +60,22 @@ def get_linebacker_motion():
     # iterate through each game
     all_games = plays["gameId"].unique()
     for gid in all_games:
-        # load the tracking for this game
-        tracking = data.load_tracking_adjusted(gid)
+        # get passing plays (isDropback) for this game
+        all_pids = plays.loc[
+            (plays["gameId"] == gid) & (plays["isDropback"] == 1), "playId"
+        ].values
+
+        # load the tracking for the passing plays of this game
+        tracking = data.index_tracking(
+            data.load_tracking_adjusted(
+                gid, play_ids=all_pids, sidecars=["motion_event"]
+            )
+        )
 
         # get player plays for this game
         player_play_game = player_play[player_play["gameId"] == gid]
 
-        # iterate through passing plays (isDropback)
-        all_pids = plays.loc[
-            (plays["gameId"] == gid) & (plays["isDropback"] == 1), "playId"
-        ].values
+        # iterate through passing plays
         for pid in all_pids:
             # get linebackers for this play
             linebackers_play = player_play_game.loc[
@@ -80,8 +85,9 @@ def get_linebacker_motion():
             ].values
 
             # get linebacker tracking
-            tracking_linebackers = tracking[
-                (tracking["playId"] == pid) & tracking["nflId"].isin(linebackers_play)
+            tracking_play = tracking.get_play(pid)
+            tracking_linebackers = tracking_play[
+                tracking_play["nflId"].isin(linebackers_play)
             ]
 
             # get the linebacker motion for this play
@@ -1,5 +1,7 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pandas as pd
 from . import data
+from . import smoothing
 import os
 from scipy.interpolate import UnivariateSpline
 import numpy as np
@@ -26,6 +28,46 @@ Y_LINESET_THRESHOLD = -5
 # spline curve smoothing parameter
 SMOOTHING_PARAM = 0.4
 
+# how the speed curves are smoothed to find the lineset and motion start frames
+#       - "spline" fits a scipy UnivariateSpline to each curve
+#       - "batched" smooths all the curves of a game in one call and applies the rules as arrays (see smoothing.py)
+SMOOTHING_ENGINE = "spline"
+
+
+# events which mark the snap of the ball
+SNAP_EVENTS = ["ball_snap", "snap_direct"]
+
+
+def _lineset_frame(
+    frame_ids: np.ndarray,
+    y: np.ndarray,
+    s: np.ndarray,
+    smoothing_param: float = SMOOTHING_PARAM,
+) -> int:
+    """
+    Get the lineset frame ID from the offense's average y and speed for each pre-snap frame
+    """
+    # if there are not enough frames before the snap, return 1
+    if len(frame_ids) < MINIMUM_PRE_SNAP_FRAMES:
+        return 1
+
+    # fit a spline to speed
+    spline = UnivariateSpline(frame_ids, s, s=smoothing_param)
+
+    # find the first frame where the spline's slope is 0, concavity is positive, and the Y is within the threshold
+    slope = spline.derivative(1)(frame_ids)
+    concavity = spline.derivative(2)(frame_ids)
+    lineset_mask = (
+        (np.abs(slope) < SPEED_NO_SLOPE_THRESHOLD)
+        & (concavity > 0)
+        & (y > Y_LINESET_THRESHOLD)
+    )
+
+    if lineset_mask.any():
+        return frame_ids[np.argmax(lineset_mask)]
+    else:
+        return 1
+
 
 def _get_lineset_event(
     tracking: pd.DataFrame, smoothing_param: float = SMOOTHING_PARAM
@@ -34,41 +76,60 @@ def _get_lineset_event(
     Get the lineset frame ID
     """
     # get pre_snap frames
-    snap_frame = tracking.loc[
-        tracking["event"].isin(["ball_snap", "snap_direct"]), "frameId"
-    ].iloc[0]
+    snap_frame = tracking.loc[tracking["event"].isin(SNAP_EVENTS), "frameId"].iloc[0]
     pre_snap = tracking["frameId"] < snap_frame
     tracking = tracking[pre_snap]
 
     # get the average distance/speed group by
     groupby_view = tracking.groupby("frameId")[["y", "s"]].mean()
 
-    # if there are not enough frames before the snap, return 1
-    if len(groupby_view) < MINIMUM_PRE_SNAP_FRAMES:
-        return 1
-
-    # fit a spline to speed
-    spline = UnivariateSpline(
-        groupby_view.index.values, groupby_view["s"].values, s=0.4
+    return _lineset_frame(
+        groupby_view.index.values,
+        groupby_view["y"].values,
+        groupby_view["s"].values,
+        smoothing_param,
     )
 
-    # find the first frame where the spline's slope is 0, concavity is positive, and the Y is within the threshold
-    lineset = None
-    deriv1 = spline.derivative(1)
-    deriv2 = spline.derivative(2)
-    for frameId in groupby_view.index:
-        if (
-            abs(deriv1(frameId)) < SPEED_NO_SLOPE_THRESHOLD
-            and deriv2(frameId) > 0
-            and groupby_view.loc[frameId, "y"] > Y_LINESET_THRESHOLD
-        ):
-            lineset = frameId
-            break
 
-    if lineset:
-        return lineset
-    else:
-        return 1
+def _get_lineset_events(
+    offense: pd.DataFrame, smoothing_param: float = SMOOTHING_PARAM
+) -> pd.Series:
+    """
+    Get the lineset frame ID of every play from a game's offensive tracking.
+
+    Returns a series of lineset frame IDs indexed by play ID. Plays without a snap event have a lineset of frame 1.
+    """
+    # get the snap frame of every play and keep only the pre-snap frames
+    snap_frames = (
+        offense.loc[offense["event"].isin(SNAP_EVENTS)].groupby("playId")["frameId"].min()
+    )
+    pre_snap = offense["frameId"].values < offense["playId"].map(snap_frames).values
+    offense = offense[pre_snap]
+
+    # get the average distance/speed of the offense for every play and frame at once
+    groupby_view = offense.groupby(["playId", "frameId"])[["y", "s"]].mean()
+    play_ids = groupby_view.index.get_level_values("playId").values
+    frame_ids = groupby_view.index.get_level_values("frameId").values
+    y = groupby_view["y"].values
+    s = groupby_view["s"].values
+
+    # the groupby output is sorted by play, so each play is a contiguous block
+    linesets = pd.Series(1, index=snap_frames.index, name="lineset")
+    new_play = np.r_[True, play_ids[1:] != play_ids[:-1]][: len(play_ids)]
+    if SMOOTHING_ENGINE == "batched" and len(play_ids) > 0:
+        linesets[play_ids[new_play]] = _batched_lineset_frames(
+            frame_ids, y, s, new_play, smoothing_param
+        )
+        return linesets
+
+    starts = np.flatnonzero(new_play)
+    stops = np.r_[starts[1:], len(play_ids)]
+    for start, stop in zip(starts, stops):
+        linesets[play_ids[start]] = _lineset_frame(
+            frame_ids[start:stop], y[start:stop], s[start:stop], smoothing_param
+        )
+
+    return linesets
 
 
 def _spline_method(
@@ -122,7 +183,7 @@ def _motion_start_frame(tracking: pd.DataFrame, lineset_frameId: int) -> int | N
         return None
 
     # get the motion start index using spline method
-    start_frame = _spline_method(tracking)
+    start_frame = _spline_method(tracking, SMOOTHING_PARAM)
 
     return start_frame
 
@@ -155,99 +216,312 @@ def _motion_end_frame(tracking: pd.DataFrame, start_frame: int) -> int:
         return tracking.loc[ball_snap_idx, "frameId"]
 
 
-def append_motion_event(force_calc: bool = False):
+# ================================= #
+# Batched Lineset and Motion Events #
+# ================================= #
+
+#   | With SMOOTHING_ENGINE = "batched" the speed curves of every play (lineset)
+#   | and of every motion player play (motion start) of a game are smoothed in
+#   | one call (see smoothing.py, the same fits as UnivariateSpline's), and the
+#   | same rules as the methods above are applied to the splines and their
+#   | derivatives as arrays, without a loop over plays or players. The frames of
+#   | a curve are assumed to be consecutive.
+
+
+def _first_in_blocks(mask: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """
+    Get the first row of each block (given its first rows) where the mask is set (`len(mask)` if none).
+    """
+    rows = np.where(mask, np.arange(len(mask)), len(mask))
+    return np.minimum.reduceat(rows, starts)
+
+
+def _batched_lineset_frames(
+    frame_ids: np.ndarray,
+    y: np.ndarray,
+    s: np.ndarray,
+    new_play: np.ndarray,
+    smoothing_param: float = SMOOTHING_PARAM,
+) -> np.ndarray:
+    """
+    Get the lineset frame ID of every play from the offense's average y and speed for each pre-snap frame
+    (batched version of `_lineset_frame`)
+    """
+    starts = np.flatnonzero(new_play)
+    lengths = np.diff(np.append(starts, len(frame_ids)))
+
+    # if there are not enough frames before the snap, the lineset is frame 1 (those plays are not smoothed)
+    enough = np.repeat(lengths >= MINIMUM_PRE_SNAP_FRAMES, lengths)
+    slope = np.full(len(frame_ids), np.nan)
+    concavity = np.full(len(frame_ids), np.nan)
+    _, slope[enough], concavity[enough] = smoothing.smooth_derivatives(
+        frame_ids[enough], s[enough], new_play[enough], smoothing_param, order=2
+    )
+
+    # the first frame where the slope is 0, concavity is positive, and the Y is within the threshold
+    lineset_mask = (
+        (np.abs(slope) < SPEED_NO_SLOPE_THRESHOLD)
+        & (concavity > 0)
+        & (y > Y_LINESET_THRESHOLD)
+    )
+    first = _first_in_blocks(lineset_mask, starts)
+    found = first < len(frame_ids)
+    return np.where(found, frame_ids[np.where(found, first, 0)], 1)
+
+
+def _batched_motion_events(
+    motion_frames: pd.DataFrame,
+    linesets: pd.Series,
+    smoothing_param: float = SMOOTHING_PARAM,
+) -> list[tuple[int, float, int, str]]:
+    """
+    Get the motion start and end frame IDs of every motion player play (batched version of `_motion_start_frame`
+    and `_motion_end_frame`)
+
+    Returns the (playId, nflId, frameId, event) motion events, for the player plays with a motion start.
+    """
+    n_rows = len(motion_frames)
+    if n_rows == 0:
+        return []
+    rows = np.arange(n_rows)
+    frame_ids = motion_frames["frameId"].values
+    s = motion_frames["s"].values
+
+    # every motion player play's rows from its lineset frame to its snap
+    _, new_player = data._block_changes(motion_frames)
+    starts = np.flatnonzero(new_player)
+    lineset_frames = motion_frames["playId"].map(linesets).fillna(1).values
+    start_rows = _first_in_blocks(frame_ids == lineset_frames, starts)
+    snap_rows = _first_in_blocks(
+        motion_frames["event"].isin(SNAP_EVENTS).values, starts
+    )
+
+    # skip the player plays when the time before snap is very short
+    valid = (
+        (start_rows < n_rows)
+        & (snap_rows < n_rows)
+        & (snap_rows - start_rows >= MINIMUM_PRE_SNAP_FRAMES)
+    )
+    start_rows, snap_rows = start_rows[valid], snap_rows[valid]
+    if len(start_rows) == 0:
+        return []
+    window_lengths = snap_rows - start_rows + 1
+    window_starts = np.r_[0, np.cumsum(window_lengths)[:-1]]
+    window = np.repeat(start_rows - window_starts, window_lengths) + np.arange(
+        window_lengths.sum()
+    )
+    new_window = np.zeros(len(window), dtype=bool)
+    new_window[window_starts] = True
+    speed, _, _, jerk_slope = smoothing.smooth_derivatives(
+        frame_ids[window], s[window], new_window, smoothing_param, order=3
+    )
+
+    # the first + -> - switch for the 3rd derivative (a jerk local maxima)
+    window_rows = np.arange(len(window))
+    negative = jerk_slope < 0
+    last_positive = np.maximum.accumulate(np.where(~negative, window_rows, -1))
+    after_positive = np.r_[-1, last_positive[:-1]] >= np.repeat(
+        window_starts, window_lengths
+    )
+    switches = _first_in_blocks(negative & after_positive, window_starts)
+    found = switches < len(window)
+    maxima_rows = switches[found] - 1
+
+    # the first frame prior to jerk maxima where speed is above the threshold
+    stops = (speed <= SPEED_THRESHOLD) | new_window
+    last_stop = np.maximum.accumulate(np.where(stops, window_rows, -1))
+    motion_start_rows = window[last_stop[maxima_rows]]
+
+    # motion ends after the last frame before the snap with a speed above the threshold
+    fast = ~(s < SPEED_THRESHOLD)
+    last_fast = np.maximum.accumulate(np.where(fast, rows, -1))
+    motion_end_rows = np.maximum(last_fast[snap_rows[found] - 1] + 1, motion_start_rows)
+
+    player_rows = start_rows[found]
+    pids = motion_frames["playId"].values[player_rows]
+    nflids = motion_frames["nflId"].values[player_rows]
+    events = []
+    for pid, nflid, start_frameId, end_frameId in zip(
+        pids, nflids, frame_ids[motion_start_rows], frame_ids[motion_end_rows]
+    ):
+        events.append((pid, nflid, start_frameId, "motion_start"))
+        events.append((pid, nflid, end_frameId, "motion_end"))
+    return events
+
+
+def _motion_events(
+    tracking: pd.DataFrame, plays_game: pd.DataFrame, player_play_game: pd.DataFrame
+) -> np.ndarray:
+    """
+    Compute the motion event column for a game's tracking data (which must include the speed `s`).
+
+    Every motion player play is visited once through a groupby and the events are applied in a single merge.
+    """
+    # get the offensive frames of every play in this game (only the columns used below)
+    possession_team = plays_game.set_index("playId")["possessionTeam"]
+    offense_mask = tracking["club"] == tracking["playId"].map(possession_team)
+    offense = tracking.loc[offense_mask, data.FRAME_KEYS + ["y", "s", "event"]]
+
+    # compute the lineset frameId of every play at once
+    linesets = _get_lineset_events(offense, SMOOTHING_PARAM)
+
+    # get the offensive frames of the motion players only
+    motion = player_play_game[player_play_game["motionSinceLineset"] == 1]
+    motion_keys = pd.MultiIndex.from_arrays(
+        [motion["playId"], motion["nflId"].astype(offense["nflId"].dtype)]
+    )
+    offense_keys = pd.MultiIndex.from_arrays([offense["playId"], offense["nflId"]])
+    motion_frames = offense[offense_keys.isin(motion_keys)]
+
+    # compute the motion start/stop frameIds of each motion player play
+    if SMOOTHING_ENGINE == "batched":
+        events = _batched_motion_events(motion_frames, linesets, SMOOTHING_PARAM)
+    else:
+        events = []
+        for (pid, nflid), player_frames in motion_frames.groupby(
+            ["playId", "nflId"], sort=False
+        ):
+            start_frameId = _motion_start_frame(player_frames, linesets.get(pid, 1))
+            if start_frameId:
+                end_frameId = _motion_end_frame(player_frames, start_frameId)
+                events.append((pid, nflid, start_frameId, "motion_start"))
+                events.append((pid, nflid, end_frameId, "motion_end"))
+
+    # motion end takes precedence if it is the same frame as motion start
+    events = pd.DataFrame(events, columns=data.FRAME_KEYS + [MOTION_EVENT_COLUMN_NAME])
+    events = events.astype(tracking[data.FRAME_KEYS].dtypes.to_dict())
+    events = events.drop_duplicates(data.FRAME_KEYS, keep="last")
+
+    # lineset is set for every player on the lineset frame (motion events overwrite it)
+    motion_event = np.full(len(tracking), None, dtype=object)
+    lineset_frames = tracking["playId"].map(linesets).fillna(1)
+    motion_event[(tracking["frameId"] == lineset_frames).values] = "lineset"
+
+    # apply the motion events with one merge on the frame keys
+    merged = tracking[data.FRAME_KEYS].merge(events, how="left", on=data.FRAME_KEYS)
+    has_event = merged[MOTION_EVENT_COLUMN_NAME].notna().values
+    motion_event[has_event] = merged.loc[has_event, MOTION_EVENT_COLUMN_NAME].values
+
+    return motion_event
+
+
+def _params() -> dict:
+    """
+    Get the parameters the motion events depend on
+    """
+    return {
+        "SPEED_THRESHOLD": SPEED_THRESHOLD,
+        "MINIMUM_PRE_SNAP_FRAMES": MINIMUM_PRE_SNAP_FRAMES,
+        "SPEED_NO_SLOPE_THRESHOLD": SPEED_NO_SLOPE_THRESHOLD,
+        "Y_LINESET_THRESHOLD": Y_LINESET_THRESHOLD,
+        "SMOOTHING_PARAM": SMOOTHING_PARAM,
+        "SMOOTHING_ENGINE": SMOOTHING_ENGINE,
+    }
+
+
+def _init_motion_worker(params: dict):
+    """
+    Set the parent process's parameters in a worker process (spawned workers import the module with the defaults)
+    """
+    globals().update(params)
+
+
+def _append_motion_event_game(
+    gid: int, plays_game: pd.DataFrame, player_play_game: pd.DataFrame, key: str
+) -> int:
+    """
+    Compute and write the motion event sidecar for one game, then mark the game as complete
+    """
+    tracking = data.load_tracking_adjusted(
+        gid, columns=data.FRAME_KEYS + ["club", "y", "v_x", "v_y", "event"]
+    )
+
+    # compute speed
+    tracking["s"] = np.sqrt(tracking["v_x"] ** 2 + tracking["v_y"] ** 2)
+
+    # compute the motion event column
+    tracking[MOTION_EVENT_COLUMN_NAME] = _motion_events(
+        tracking, plays_game, player_play_game
+    )
+
+    # write the motion events to the game's sidecar table
+    data._write_sidecar(
+        MOTION_EVENT_COLUMN_NAME,
+        gid,
+        tracking[data.FRAME_KEYS + [MOTION_EVENT_COLUMN_NAME]],
+    )
+    data._write_marker(MOTION_EVENT_COLUMN_NAME, gid, key)
+
+    return gid
+
+
+def append_motion_event(
+    force_calc: bool = False,
+    gids: list[int] | None = None,
+    resume: bool = False,
+    workers: int | None = None,
+):
     """
     Perform lineset detection and motion start/stop on the adjusted tracking data and
-    appends the event column to the tracking data if it does not already exist.
+    write the event column to the `motion_event` sidecar if it does not already exist.
+    Load it with `data.load_tracking_adjusted(gid, sidecars=["motion_event"])`.
 
-    Pass `force_calc = True` to force the event column to be recalculated even if it exists.
+    Each game writes a completion marker, so games already computed with the current parameters are skipped
+    and an interrupted run picks up where it stopped. Pass `force_calc = True` to recompute every game, or
+    `force_calc = True, resume = True` to continue an interrupted forced run.
+    Pass `gids` to only process those games. Games are processed on `workers` processes (defaults to the CPU count).
     """
     # load in the data
-    games = pd.read_csv(os.path.join(data.DATA_DIR, "games.csv"))
-    plays = pd.read_csv(os.path.join(data.DATA_DIR, "plays.csv"))
-    player_play = pd.read_csv(os.path.join(data.DATA_DIR, "player_play.csv"))
+    games = data.load_reference("games")
+    all_gids = games["gameId"].unique() if gids is None else gids
+    params = _params()
+    key = data._params_key(params)
 
-    # iterate through each adjusted tracking game file
-    all_gids = games["gameId"].unique()
-    with tqdm.tqdm(total=len(all_gids), desc="Calculating motion events") as pbar:
+    # a forced run starts over unless it is resuming
+    if force_calc and not resume:
         for gid in all_gids:
-            tracking = data.load_tracking_adjusted(gid)
-
-            # compute speed
-            tracking["s"] = np.sqrt(tracking["v_x"] ** 2 + tracking["v_y"] ** 2)
-
-            # if the event column already exists and we do not force_calc is False, there is nothing more to be done - return
-            if MOTION_EVENT_COLUMN_NAME in tracking.columns and not force_calc:
-                pbar.n = len(all_gids)
-                pbar.last_print_n = len(all_gids)
-                pbar.update(0)
-                return
-
-            # initialize motion event column
-            tracking[MOTION_EVENT_COLUMN_NAME] = None
-
-            # get only player play data for this game
-            player_play_game_mask = player_play["gameId"] == gid
-            player_play_game = player_play[player_play_game_mask]
-
-            # iterate over each play
-            all_pids = tracking["playId"].unique()
-            for pid in all_pids:
-                # get the offensive team
-                plays_game_mask = plays["gameId"] == gid
-                plays_play_mask = plays["playId"] == pid
-                offensive_club = plays.loc[
-                    plays_game_mask & plays_play_mask, "possessionTeam"
-                ].squeeze()
-
-                # get offensive frames for this play
-                tracking_play_mask = tracking["playId"] == pid
-                play_frames = tracking[tracking_play_mask]
-                play_frames_offense_mask = play_frames["club"] == offensive_club
-                offensive_frames = play_frames[play_frames_offense_mask]
-
-                # compute the lineset frameId
-                lineset_frameId = _get_lineset_event(offensive_frames)
-
-                # set the event column
-                tracking_lineset_frame_mask = tracking["frameId"] == lineset_frameId
-                tracking.loc[
-                    tracking_play_mask & tracking_lineset_frame_mask,
-                    MOTION_EVENT_COLUMN_NAME,
-                ] = "lineset"
-
-                # iterate through motion players on this play
-                player_play_play_mask = player_play_game["playId"] == pid
-                player_play_motion_mask = player_play_game["motionSinceLineset"] == 1
-                all_nflids = player_play_game.loc[
-                    player_play_play_mask & player_play_motion_mask, "nflId"
-                ]
-
-                for nflid in all_nflids:
-                    # get the player play frames
-                    offense_player_mask = offensive_frames["nflId"] == nflid
-                    player_frames = offensive_frames[offense_player_mask]
-
-                    # compute the motion start/stop frameIds
-                    start_frameId = _motion_start_frame(player_frames, lineset_frameId)
-                    if start_frameId:
-                        end_frameId = _motion_end_frame(player_frames, start_frameId)
-
-                        # set the event column
-                        tracking_player_mask = tracking["nflId"] == nflid
-                        start_frame = tracking["frameId"] == start_frameId
-                        tracking.loc[
-                            tracking_play_mask & tracking_player_mask & start_frame,
-                            MOTION_EVENT_COLUMN_NAME,
-                        ] = "motion_start"
-                        end_frame = tracking["frameId"] == end_frameId
-                        tracking.loc[
-                            tracking_play_mask & tracking_player_mask & end_frame,
-                            MOTION_EVENT_COLUMN_NAME,
-                        ] = "motion_end"
-            pbar.update(1)
-
-            tracking.drop(columns=["s"])
-
-            # write the new adjusted tracking data with the lineset event column
-            tracking.to_parquet(data.tracking_adjusted_path(gid))
+            data._clear_markers(gid, MOTION_EVENT_COLUMN_NAME)
+
+    # skip the games which are already complete
+    todo = [
+        gid
+        for gid in all_gids
+        if not data._has_marker(MOTION_EVENT_COLUMN_NAME, gid, key)
+    ]
+
+    # get the plays and player plays for each game
+    tasks = [
+        (
+            gid,
+            data.load_reference("plays", gid),
+            data.load_reference("player_play", gid),
+            key,
+        )
+        for gid in todo
+    ]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    with tqdm.tqdm(
+        total=len(all_gids),
+        initial=len(all_gids) - len(todo),
+        desc="Calculating motion events",
+    ) as pbar:
+        if workers <= 1:
+            for task in tasks:
+                _append_motion_event_game(*task)
+                pbar.update(1)
+            return
+
+        # iterate through each adjusted tracking game file in parallel
+        # the workers compute with the same parameters as the key of their markers
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_motion_worker, initargs=(params,)
+        ) as executor:
+            futures = [
+                executor.submit(_append_motion_event_game, *task) for task in tasks
+            ]
+            for future in as_completed(futures):
+                future.result()
+                pbar.update(1)
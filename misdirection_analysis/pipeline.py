@@ -0,0 +1,252 @@
+import json
+import os
+from dataclasses import dataclass, field
+from types import ModuleType
+from typing import Callable
+import pandas as pd
+from . import data
+from . import motion_detection
+from . import separation
+from . import separation_metric
+from . import premotion_classify
+
+
+# =============== #
+# Pipeline Runner #
+# =============== #
+
+#   | Each stage declares the stages it reads from, the files it writes and the
+#   | parameters its output depends on. The runner keeps a manifest of the
+#   | parameter hash each game was last computed with, so only games whose
+#   | parameters changed, whose files are missing, or whose inputs were
+#   | recomputed are run again.
+
+
+# manifest key for stages that are not computed per game
+_ALL_GAMES = "all"
+
+
+def _manifest_path() -> str:
+    return os.path.join(data._PARQ_DIR, "pipeline-manifest.json")
+
+
+@dataclass
+class Stage:
+    """
+    A single step of the data pipeline.
+
+    `run` is called with the game IDs to (re)compute (or None if the stage is not per game) and
+    whether the run is forced.
+    `outputs` returns the files the stage writes for a game ID (None if the stage is not per game).
+    """
+
+    name: str
+    run: Callable[[list[int] | None, bool], None]
+    outputs: Callable[[int | None], list[str]]
+    inputs: list[str] = field(default_factory=list)
+    params: Callable[[], dict] = dict
+    per_game: bool = True
+
+
+def _module_params(module: ModuleType, *names: str) -> dict:
+    """
+    Get the current values of the module constants a stage's output depends on.
+    """
+    return {name: getattr(module, name) for name in names}
+
+
+def _stages(sepbase_id: str = "main") -> list[Stage]:
+    """
+    Get the stages of the pipeline in dependency order.
+    """
+    return [
+        Stage(
+            name="raw",
+            run=lambda gids, _: data._create_tracking_raw(
+                True, sorted({data._game_weeks()[gid] for gid in gids})
+            ),
+            outputs=lambda gid: [data.tracking_raw_path(gid)],
+        ),
+        Stage(
+            name="adjusted",
+            inputs=["raw"],
+            run=lambda gids, _: data._create_tracking_adjusted(True, gids=gids),
+            outputs=lambda gid: [data.tracking_adjusted_path(gid)],
+        ),
+        Stage(
+            name="motion_event",
+            inputs=["adjusted"],
+            # games finished by an interrupted run are skipped through their completion markers
+            run=lambda gids, force: motion_detection.append_motion_event(force, gids),
+            outputs=lambda gid: [
+                data._sidecar_path(motion_detection.MOTION_EVENT_COLUMN_NAME, gid)
+            ],
+            params=motion_detection._params,
+        ),
+        Stage(
+            name="separation_files",
+            inputs=["adjusted"],
+            run=lambda gids, _: separation._create_separation_files(
+                True, sepbase_id, gids
+            ),
+            outputs=lambda gid: [separation._separation_files_path(gid, sepbase_id)],
+        ),
+        Stage(
+            name="emp_dist",
+            inputs=["separation_files"],
+            run=lambda *_: separation._compute_emp_dist_data(True, sepbase_id),
+            outputs=lambda _: [separation._emp_dist_data_path(sepbase_id)],
+            per_game=False,
+        ),
+        Stage(
+            name="separation_probability",
+            inputs=["separation_files", "emp_dist"],
+            run=lambda gids, _: separation._write_separation_probability(
+                True, sepbase_id, gids
+            ),
+            outputs=lambda gid: [
+                data._sidecar_path(separation.SEPARATION_PROBABILITY_SIDECAR, gid)
+            ],
+            params=lambda: _module_params(separation, "INITIAL_GUESS"),
+        ),
+        Stage(
+            name="premotion_classification",
+            inputs=["motion_event"],
+            run=lambda gids, _: premotion_classify.append_premotion_classification(
+                True, gids
+            ),
+            outputs=lambda gid: [premotion_classify._classification_path(gid)],
+        ),
+        Stage(
+            name="separation_metric",
+            inputs=["adjusted"],
+            run=lambda gids, _: separation_metric.append_separation_metric(
+                True, sepbase_id, gids
+            ),
+            outputs=lambda gid: [
+                data._sidecar_path(separation_metric.SEPARATION_METRIC_SIDECAR, gid)
+            ],
+            params=lambda: _module_params(
+                separation_metric, "PASS_SPEED", "QB_DROP_BACK"
+            ),
+        ),
+        Stage(
+            name="season_store",
+            inputs=["adjusted"],
+            run=lambda *_: data.export_season_store(True),
+            outputs=lambda _: [data.season_store_path()],
+            per_game=False,
+        ),
+    ]
+
+
+def _required_stages(stages: list[Stage], targets: list[str] | None) -> list[Stage]:
+    """
+    Get the target stages and every stage they depend on, in dependency order.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    if targets is None:
+        return stages
+
+    required = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in by_name:
+            raise ValueError(f"Unknown pipeline stage: {name}")
+        if name not in required:
+            required.add(name)
+            pending.extend(by_name[name].inputs)
+
+    return [stage for stage in stages if stage.name in required]
+
+
+def _dependents(stages: list[Stage], stage: Stage) -> list[Stage]:
+    """
+    Get every stage that reads from the stage (directly or not).
+    """
+    dependents = []
+    upstream = {stage.name}
+    for other in stages:
+        if any(name in upstream for name in other.inputs):
+            upstream.add(other.name)
+            dependents.append(other)
+    return dependents
+
+
+def _load_manifest() -> dict[str, dict[str, str]]:
+    path = _manifest_path()
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_manifest(manifest: dict[str, dict[str, str]]):
+    with open(_manifest_path(), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def _is_fresh(stage: Stage, records: dict[str, str], key: str, gid: int | None):
+    record = _ALL_GAMES if gid is None else str(gid)
+    if records.get(record) != key:
+        return False
+    return all(os.path.exists(path) for path in stage.outputs(gid))
+
+
+def run(
+    targets: list[str] | None = None,
+    force_calcs: bool = False,
+    sepbase_id: str = "main",
+):
+    """
+    Run the pipeline stages needed for `targets` (all stages if None), only recomputing stale games.
+
+    A game is stale for a stage if the stage's parameters changed since it was computed, its output
+    files are missing, or a stage it reads from was recomputed. Pass `force_calcs = True` to recompute everything.
+    """
+    # create the parqs folder if it does not exist
+    os.makedirs(data._PARQ_DIR, exist_ok=True)
+
+    stages = _stages(sepbase_id)
+    games = data.load_reference("games")
+    all_gids = [int(gid) for gid in games["gameId"].unique()]
+    manifest = _load_manifest()
+
+    for stage in _required_stages(stages, targets):
+        key = data._params_key(stage.params())
+        records = manifest.setdefault(stage.name, {})
+
+        # find the stale games (or whether the whole stage is stale)
+        if stage.per_game:
+            stale = [
+                gid
+                for gid in all_gids
+                if force_calcs or not _is_fresh(stage, records, key, gid)
+            ]
+        elif force_calcs or not _is_fresh(stage, records, key, None):
+            stale = [None]
+        else:
+            stale = []
+        if len(stale) == 0:
+            continue
+
+        # run the stage
+        if stage.per_game:
+            print(f"Running {stage.name} for {len(stale)} game(s)")
+            stage.run(stale, force_calcs)
+        else:
+            print(f"Running {stage.name}")
+            stage.run(None, force_calcs)
+
+        # record the games and invalidate anything computed from the old output
+        for gid in stale:
+            records[_ALL_GAMES if gid is None else str(gid)] = key
+        for dependent in _dependents(stages, stage):
+            dependent_records = manifest.get(dependent.name, {})
+            if not stage.per_game or not dependent.per_game:
+                dependent_records.clear()
+            else:
+                for gid in stale:
+                    dependent_records.pop(str(gid), None)
+        _save_manifest(manifest)
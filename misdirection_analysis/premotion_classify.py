@@ -13,383 +13,446 @@ CLASSIFICATION_COLUMN_NAME = "premotion_classification"
 CROSSOVER_LEFT_JET = "crossover_left_jet"
 
 
-def _crossover_left_jet(tracking: pd.DataFrame) -> bool:
+def _crossover_left_jet(features: pd.DataFrame) -> pd.Series:
     SPEED_THRESH = -2
     X_THRESH = 5
 
-    initial_x = tracking["x"].iloc[0]
-    final_x = tracking["x"].iloc[-1]
-    final_v_x = tracking["v_x"].iloc[-1]
+    initial_x = features["initial_x"]
+    final_x = features["final_x"]
+    final_v_x = features["final_v_x"]
 
-    if initial_x > 0 and final_x < X_THRESH and final_v_x < SPEED_THRESH:
-        return True
-    else:
-        return False
+    return (initial_x > 0) & (final_x < X_THRESH) & (final_v_x < SPEED_THRESH)
 
 
 CROSSOVER_RIGHT_JET = "crossover_right_jet"
 
 
-def _crossover_right_jet(tracking: pd.DataFrame) -> bool:
+def _crossover_right_jet(features: pd.DataFrame) -> pd.Series:
     SPEED_THRESH = 2
     X_THRESH = -5
 
-    initial_x = tracking["x"].iloc[0]
-    final_x = tracking["x"].iloc[-1]
-    final_v_x = tracking["v_x"].iloc[-1]
+    initial_x = features["initial_x"]
+    final_x = features["final_x"]
+    final_v_x = features["final_v_x"]
 
-    if initial_x < 0 and final_x > X_THRESH and final_v_x > SPEED_THRESH:
-        return True
-    else:
-        return False
+    return (initial_x < 0) & (final_x > X_THRESH) & (final_v_x > SPEED_THRESH)
 
 
 CROSSOVER_LEFT_SET = "crossover_left_set"
 
 
-def _crossover_left_set(tracking: pd.DataFrame) -> bool:
+def _crossover_left_set(features: pd.DataFrame) -> pd.Series:
     X_THRESH = 2.5
     SPEED_THRESH = 2
 
-    initial_x = tracking["x"].iloc[0]
-    final_x = tracking["x"].iloc[-1]
-    final_speed = tracking["s"].iloc[-1]
+    initial_x = features["initial_x"]
+    final_x = features["final_x"]
+    final_speed = features["final_speed"]
 
-    if initial_x > X_THRESH and final_x < -X_THRESH and final_speed < SPEED_THRESH:
-        return True
-    else:
-        return False
+    return (initial_x > X_THRESH) & (final_x < -X_THRESH) & (final_speed < SPEED_THRESH)
 
 
 CROSSOVER_RIGHT_SET = "crossover_right_set"
 
 
-def _crossover_right_set(tracking: pd.DataFrame) -> bool:
+def _crossover_right_set(features: pd.DataFrame) -> pd.Series:
     X_THRESH = -2.5
     SPEED_THRESH = 2
 
-    initial_x = tracking["x"].iloc[0]
-    final_x = tracking["x"].iloc[-1]
-    final_speed = tracking["s"].iloc[-1]
+    initial_x = features["initial_x"]
+    final_x = features["final_x"]
+    final_speed = features["final_speed"]
 
-    if initial_x < X_THRESH and final_x > -X_THRESH and final_speed < SPEED_THRESH:
-        return True
-    else:
-        return False
+    return (initial_x < X_THRESH) & (final_x > -X_THRESH) & (final_speed < SPEED_THRESH)
 
 
 LEFT_SIDE_SHIFT_LEFT = "left_side_shift_left"
 
 
-def _left_side_shift_left(tracking: pd.DataFrame) -> bool:
+def _left_side_shift_left(features: pd.DataFrame) -> pd.Series:
     SPEED_THRESH = 2
 
-    initial_x = tracking["x"].iloc[0]
-    final_x = tracking["x"].iloc[-1]
-    final_speed = tracking["s"].iloc[-1]
+    initial_x = features["initial_x"]
+    final_x = features["final_x"]
+    final_speed = features["final_speed"]
 
-    if (
-        initial_x < 0
-        and final_x < 0
-        and final_x < initial_x
-        and final_speed < SPEED_THRESH
-    ):
-        return True
-    else:
-        return False
+    return (
+        (initial_x < 0)
+        & (final_x < 0)
+        & (final_x < initial_x)
+        & (final_speed < SPEED_THRESH)
+    )
 
 
 LEFT_SIDE_SHIFT_RIGHT = "left_side_shift_right"
 
 
-def _left_side_shift_right(tracking: pd.DataFrame) -> bool:
+def _left_side_shift_right(features: pd.DataFrame) -> pd.Series:
     SPEED_THRESH = 2
 
-    initial_x = tracking["x"].iloc[0]
-    final_x = tracking["x"].iloc[-1]
-    final_speed = tracking["s"].iloc[-1]
+    initial_x = features["initial_x"]
+    final_x = features["final_x"]
+    final_speed = features["final_speed"]
 
-    if (
-        initial_x < 0
-        and final_x < 0
-        and final_x > initial_x
-        and final_speed < SPEED_THRESH
-    ):
-        return True
-    else:
-        return False
+    return (
+        (initial_x < 0)
+        & (final_x < 0)
+        & (final_x > initial_x)
+        & (final_speed < SPEED_THRESH)
+    )
 
 
 RIGHT_SIDE_SHIFT_LEFT = "right_side_shift_left"
 
 
-def _right_side_shift_left(tracking: pd.DataFrame) -> bool:
+def _right_side_shift_left(features: pd.DataFrame) -> pd.Series:
     SPEED_THRESH = 2
 
-    initial_x = tracking["x"].iloc[0]
-    final_x = tracking["x"].iloc[-1]
-    final_speed = tracking["s"].iloc[-1]
+    initial_x = features["initial_x"]
+    final_x = features["final_x"]
+    final_speed = features["final_speed"]
 
-    if (
-        initial_x > 0
-        and final_x > 0
-        and final_x < initial_x
-        and final_speed < SPEED_THRESH
-    ):
-        return True
-    else:
-        return False
+    return (
+        (initial_x > 0)
+        & (final_x > 0)
+        & (final_x < initial_x)
+        & (final_speed < SPEED_THRESH)
+    )
 
 
 RIGHT_SIDE_SHIFT_RIGHT = "right_side_shift_right"
 
 
-def _right_side_shift_right(tracking: pd.DataFrame) -> bool:
+def _right_side_shift_right(features: pd.DataFrame) -> pd.Series:
     SPEED_THRESH = 2
 
-    initial_x = tracking["x"].iloc[0]
-    final_x = tracking["x"].iloc[-1]
-    final_speed = tracking["s"].iloc[-1]
+    initial_x = features["initial_x"]
+    final_x = features["final_x"]
+    final_speed = features["final_speed"]
 
-    if (
-        initial_x > 0
-        and final_x > 0
-        and final_x > initial_x
-        and final_speed < SPEED_THRESH
-    ):
-        return True
-    else:
-        return False
+    return (
+        (initial_x > 0)
+        & (final_x > 0)
+        & (final_x > initial_x)
+        & (final_speed < SPEED_THRESH)
+    )
 
 
 LEFT_SIDE_JET_LEFT = "left_side_jet_left"
 
 
-def _left_side_jet_left(tracking: pd.DataFrame) -> bool:
+def _left_side_jet_left(features: pd.DataFrame) -> pd.Series:
     SPEED_THRESH = 2
 
-    initial_x = tracking["x"].iloc[0]
-    final_x = tracking["x"].iloc[-1]
-    final_speed = tracking["s"].iloc[-1]
+    initial_x = features["initial_x"]
+    final_x = features["final_x"]
+    final_speed = features["final_speed"]
 
-    if (
-        initial_x < 0
-        and final_x < 0
-        and final_x < initial_x
-        and final_speed > SPEED_THRESH
-    ):
-        return True
-    else:
-        return False
+    return (
+        (initial_x < 0)
+        & (final_x < 0)
+        & (final_x < initial_x)
+        & (final_speed > SPEED_THRESH)
+    )
 
 
 LEFT_SIDE_JET_RIGHT = "left_side_jet_right"
 
 
-def _left_side_jet_right(tracking: pd.DataFrame) -> bool:
+def _left_side_jet_right(features: pd.DataFrame) -> pd.Series:
     SPEED_THRESH = 2
     X_THRESH = -5
 
-    initial_x = tracking["x"].iloc[0]
-    final_x = tracking["x"].iloc[-1]
-    final_speed = tracking["s"].iloc[-1]
+    initial_x = features["initial_x"]
+    final_x = features["final_x"]
+    final_speed = features["final_speed"]
 
-    if (
-        initial_x < 0
-        and final_x < X_THRESH
-        and final_x > initial_x
-        and final_speed > SPEED_THRESH
-    ):
-        return True
-    else:
-        return False
+    return (
+        (initial_x < 0)
+        & (final_x < X_THRESH)
+        & (final_x > initial_x)
+        & (final_speed > SPEED_THRESH)
+    )
 
 
 RIGHT_SIDE_JET_LEFT = "right_side_jet_left"
 
 
-def _right_side_jet_left(tracking: pd.DataFrame) -> bool:
+def _right_side_jet_left(features: pd.DataFrame) -> pd.Series:
     SPEED_THRESH = 2
     X_THRESH = 5
 
-    initial_x = tracking["x"].iloc[0]
-    final_x = tracking["x"].iloc[-1]
-    final_speed = tracking["s"].iloc[-1]
+    initial_x = features["initial_x"]
+    final_x = features["final_x"]
+    final_speed = features["final_speed"]
 
-    if (
-        initial_x > 0
-        and final_x > X_THRESH
-        and final_x < initial_x
-        and final_speed > SPEED_THRESH
-    ):
-        return True
-    else:
-        return False
+    return (
+        (initial_x > 0)
+        & (final_x > X_THRESH)
+        & (final_x < initial_x)
+        & (final_speed > SPEED_THRESH)
+    )
 
 
 RIGHT_SIDE_JET_RIGHT = "right_side_jet_right"
 
 
-def _right_side_jet_right(tracking: pd.DataFrame) -> bool:
+def _right_side_jet_right(features: pd.DataFrame) -> pd.Series:
     SPEED_THRESH = 2
 
-    initial_x = tracking["x"].iloc[0]
-    final_x = tracking["x"].iloc[-1]
-    final_speed = tracking["s"].iloc[-1]
+    initial_x = features["initial_x"]
+    final_x = features["final_x"]
+    final_speed = features["final_speed"]
 
-    if (
-        initial_x > 0
-        and final_x > 0
-        and final_x > initial_x
-        and final_speed > SPEED_THRESH
-    ):
-        return True
-    else:
-        return False
+    return (
+        (initial_x > 0)
+        & (final_x > 0)
+        & (final_x > initial_x)
+        & (final_speed > SPEED_THRESH)
+    )
 
 
 BACKFIELD_RIGHT_SET = "backfield_right_set"
 
 
-def _backfield_right_set(tracking: pd.DataFrame) -> bool:
+def _backfield_right_set(features: pd.DataFrame) -> pd.Series:
     X_THRESH = 2.5
     SPEED_THRESH = 2
 
-    initial_x = tracking["x"].iloc[0]
-    final_x = tracking["x"].iloc[-1]
-    final_speed = tracking["s"].iloc[-1]
+    initial_x = features["initial_x"]
+    final_x = features["final_x"]
+    final_speed = features["final_speed"]
 
-    if (
-        initial_x < X_THRESH
-        and initial_x > -X_THRESH
-        and final_x > X_THRESH
-        and final_speed < SPEED_THRESH
-    ):
-        return True
-    else:
-        return False
+    return (
+        (initial_x < X_THRESH)
+        & (initial_x > -X_THRESH)
+        & (final_x > X_THRESH)
+        & (final_speed < SPEED_THRESH)
+    )
 
 
 BACKFIELD_LEFT_SET = "backfield_left_set"
 
 
-def _backfield_left_set(tracking: pd.DataFrame) -> bool:
+def _backfield_left_set(features: pd.DataFrame) -> pd.Series:
     X_THRESH = 2.5
     SPEED_THRESH = 2
 
-    initial_x = tracking["x"].iloc[0]
-    final_x = tracking["x"].iloc[-1]
-    final_speed = tracking["s"].iloc[-1]
+    initial_x = features["initial_x"]
+    final_x = features["final_x"]
+    final_speed = features["final_speed"]
 
-    if (
-        initial_x < X_THRESH
-        and initial_x > -X_THRESH
-        and final_x < -X_THRESH
-        and final_speed < SPEED_THRESH
-    ):
-        return True
-    else:
-        return False
+    return (
+        (initial_x < X_THRESH)
+        & (initial_x > -X_THRESH)
+        & (final_x < -X_THRESH)
+        & (final_speed < SPEED_THRESH)
+    )
 
 
 BACKFIELD_RIGHT_JET = "backfield_right_jet"
 
 
-def _backfield_right_jet(tracking: pd.DataFrame) -> bool:
+def _backfield_right_jet(features: pd.DataFrame) -> pd.Series:
     X_THRESH = 2.5
     SPEED_THRESH = 2
     V_X_THRESH = 2
 
-    initial_x = tracking["x"].iloc[0]
-    final_x = tracking["x"].iloc[-1]
-    final_speed = tracking["s"].iloc[-1]
-    final_v_x = tracking["v_x"].iloc[-1]
+    initial_x = features["initial_x"]
+    final_x = features["final_x"]
+    final_speed = features["final_speed"]
+    final_v_x = features["final_v_x"]
 
-    if (
-        initial_x < X_THRESH
-        and initial_x > -X_THRESH
-        and final_x > X_THRESH
-        and final_speed > SPEED_THRESH
-        and final_v_x > V_X_THRESH
-    ):
-        return True
-    else:
-        return False
+    return (
+        (initial_x < X_THRESH)
+        & (initial_x > -X_THRESH)
+        & (final_x > X_THRESH)
+        & (final_speed > SPEED_THRESH)
+        & (final_v_x > V_X_THRESH)
+    )
 
 
 BACKFIELD_LEFT_JET = "backfield_left_jet"
 
 
-def _backfield_left_jet(tracking: pd.DataFrame) -> bool:
+def _backfield_left_jet(features: pd.DataFrame) -> pd.Series:
     X_THRESH = 2.5
     SPEED_THRESH = 2
     V_X_THRESH = -2
 
-    initial_x = tracking["x"].iloc[0]
-    final_x = tracking["x"].iloc[-1]
-    final_speed = tracking["s"].iloc[-1]
-    final_v_x = tracking["v_x"].iloc[-1]
-
-    if (
-        initial_x < X_THRESH
-        and initial_x > -X_THRESH
-        and final_x < X_THRESH
-        and final_speed > SPEED_THRESH
-        and final_v_x < V_X_THRESH
-    ):
-        return True
-    else:
-        return False
-
-
-def _classify_motion(tracking: pd.DataFrame) -> str:
-    motion_types = []
-    if _crossover_left_jet(tracking):
-        motion_types.append(CROSSOVER_LEFT_JET)
-    if _crossover_right_jet(tracking):
-        motion_types.append(CROSSOVER_RIGHT_JET)
-    if _crossover_left_set(tracking):
-        motion_types.append(CROSSOVER_LEFT_SET)
-    if _crossover_right_set(tracking):
-        motion_types.append(CROSSOVER_RIGHT_SET)
-    if _left_side_shift_left(tracking):
-        motion_types.append(LEFT_SIDE_SHIFT_LEFT)
-    if _left_side_shift_right(tracking):
-        motion_types.append(LEFT_SIDE_SHIFT_RIGHT)
-    if _right_side_shift_left(tracking):
-        motion_types.append(RIGHT_SIDE_SHIFT_LEFT)
-    if _right_side_shift_right(tracking):
-        motion_types.append(RIGHT_SIDE_SHIFT_RIGHT)
-    if _left_side_jet_left(tracking):
-        motion_types.append(LEFT_SIDE_JET_LEFT)
-    if _left_side_jet_right(tracking):
-        motion_types.append(LEFT_SIDE_JET_RIGHT)
-    if _right_side_jet_left(tracking):
-        motion_types.append(RIGHT_SIDE_JET_LEFT)
-    if _right_side_jet_right(tracking):
-        motion_types.append(RIGHT_SIDE_JET_RIGHT)
-    if _backfield_right_set(tracking):
-        motion_types.append(BACKFIELD_RIGHT_SET)
-    if _backfield_left_set(tracking):
-        motion_types.append(BACKFIELD_LEFT_SET)
-    if _backfield_right_jet(tracking):
-        motion_types.append(BACKFIELD_RIGHT_JET)
-    if _backfield_left_jet(tracking):
-        motion_types.append(BACKFIELD_LEFT_JET)
-
-    if len(motion_types) == 0:
-        return "unclassified"
-    else:
-        return "|".join(motion_types)
-
-
-def append_premotion_classification(force_calc: bool = False):
+    initial_x = features["initial_x"]
+    final_x = features["final_x"]
+    final_speed = features["final_speed"]
+    final_v_x = features["final_v_x"]
+
+    return (
+        (initial_x < X_THRESH)
+        & (initial_x > -X_THRESH)
+        & (final_x < X_THRESH)
+        & (final_speed > SPEED_THRESH)
+        & (final_v_x < V_X_THRESH)
+    )
+
+
+# rules evaluated on every motion segment, in the order they are joined in the classification
+MOTION_RULES = [
+    (CROSSOVER_LEFT_JET, _crossover_left_jet),
+    (CROSSOVER_RIGHT_JET, _crossover_right_jet),
+    (CROSSOVER_LEFT_SET, _crossover_left_set),
+    (CROSSOVER_RIGHT_SET, _crossover_right_set),
+    (LEFT_SIDE_SHIFT_LEFT, _left_side_shift_left),
+    (LEFT_SIDE_SHIFT_RIGHT, _left_side_shift_right),
+    (RIGHT_SIDE_SHIFT_LEFT, _right_side_shift_left),
+    (RIGHT_SIDE_SHIFT_RIGHT, _right_side_shift_right),
+    (LEFT_SIDE_JET_LEFT, _left_side_jet_left),
+    (LEFT_SIDE_JET_RIGHT, _left_side_jet_right),
+    (RIGHT_SIDE_JET_LEFT, _right_side_jet_left),
+    (RIGHT_SIDE_JET_RIGHT, _right_side_jet_right),
+    (BACKFIELD_RIGHT_SET, _backfield_right_set),
+    (BACKFIELD_LEFT_SET, _backfield_left_set),
+    (BACKFIELD_RIGHT_JET, _backfield_right_jet),
+    (BACKFIELD_LEFT_JET, _backfield_left_jet),
+]
+
+
+def _motion_features(tracking: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reduce each player's motion (from its motion start to motion end frame) to a feature row.
+
+    Returns a frame indexed by playId and nflId with the initial x, final x, final speed and final v_x.
+    """
+    keys = ["playId", "nflId"]
+
+    # get the first motion start and end frame of each player
+    start_frames = tracking.loc[
+        tracking[MOTION_EVENT_COLUMN_NAME] == "motion_start", keys + ["frameId"]
+    ].drop_duplicates(keys)
+    end_frames = tracking.loc[
+        tracking[MOTION_EVENT_COLUMN_NAME] == "motion_end", keys + ["frameId"]
+    ].drop_duplicates(keys)
+    segments = pd.merge(start_frames, end_frames, on=keys, suffixes=("_start", "_end"))
+
+    # get tracking between these frames
+    tracking_frames = pd.merge(tracking, segments, on=keys)
+    tracking_frames = tracking_frames[
+        (tracking_frames["frameId"] >= tracking_frames["frameId_start"])
+        & (tracking_frames["frameId"] <= tracking_frames["frameId_end"])
+    ].sort_values(keys + ["frameId"])
+
+    # first and last frame of each segment
+    first = tracking_frames.drop_duplicates(keys, keep="first").set_index(keys)
+    last = tracking_frames.drop_duplicates(keys, keep="last").set_index(keys)
+
+    return pd.DataFrame(
+        {
+            "initial_x": first["x"],
+            "final_x": last["x"],
+            "final_speed": last["s"],
+            "final_v_x": last["v_x"],
+        }
+    )
+
+
+def _classify_motions(features: pd.DataFrame) -> pd.Series:
+    """
+    Classify every motion feature row, joining the names of all matching rules with "|".
+    """
+    motion_types = pd.Series("", index=features.index, dtype=object)
+    for name, rule in MOTION_RULES:
+        motion_types[rule(features).to_numpy()] += "|" + name
+
+    motion_types = motion_types.str[1:]
+    motion_types[motion_types == ""] = "unclassified"
+
+    return motion_types
+
+
+# ==================== #
+# Classification Table #
+# ==================== #
+
+#   | The classifications are not written back into player_play.csv. Each game's
+#   | classified player plays are stored in their own table keyed by gameId,
+#   | playId and nflId, and joined on demand by load_player_play()
+#   |     data/parqs/premotion-classification/2022090800.parq
+
+
+def _classification_dir() -> str:
+    return os.path.join(data._PARQ_DIR, "premotion-classification")
+
+
+def _classification_path(gid: int) -> str:
+    return os.path.join(_classification_dir(), f"{gid}.parq")
+
+
+def _write_classification(gid: int, classification: pd.DataFrame):
+    """
+    Atomically write a game's classification table.
+    """
+    path = _classification_path(gid)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    classification.to_parquet(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+
+
+def load_premotion_classification() -> pd.DataFrame:
+    """
+    Load the premotion classification of every classified player play (gameId, playId, nflId, premotion_classification).
+    """
+    columns = ["gameId", "playId", "nflId", CLASSIFICATION_COLUMN_NAME]
+    paths = (
+        sorted(
+            os.path.join(_classification_dir(), name)
+            for name in os.listdir(_classification_dir())
+            if name.endswith(".parq")
+        )
+        if os.path.exists(_classification_dir())
+        else []
+    )
+    if len(paths) == 0:
+        return pd.DataFrame(columns=columns)
+    return pd.concat([pd.read_parquet(path) for path in paths], ignore_index=True)
+
+
+def load_player_play() -> pd.DataFrame:
+    """
+    Load the player play data with the `premotion_classification` column joined on.
+
+    Player plays that were not classified have a missing classification.
+    """
+    player_play = data.load_reference("player_play")
+
+    # drop a classification column left in the csv by older runs
+    player_play = player_play.drop(
+        columns=[CLASSIFICATION_COLUMN_NAME], errors="ignore"
+    )
+
+    keys = ["gameId", "playId", "nflId"]
+    classification = load_premotion_classification().astype(
+        player_play[keys].dtypes.to_dict()
+    )
+    return pd.merge(
+        player_play,
+        classification,
+        how="left",
+        on=keys,
+        validate="1:1",
+    )
+
+
+def append_premotion_classification(
+    force_calc: bool = False, gids: list[int] | None = None
+):
+    """
+    Classify each pre-motion player play and write the classifications to the premotion classification table.
+    Load them with `load_player_play()`.
+
+    Pass `force_calc = True` to force the classifications to be recalculated even if they exist.
+    Pass `gids` to only process those games.
+    """
     # load in the data
-    player_play = pd.read_csv(os.path.join(data.DATA_DIR, "player_play.csv"))
-
-    # if the column already exists and we do not force calculation, there is nothing to do
-    if not force_calc and CLASSIFICATION_COLUMN_NAME in player_play.columns:
-        return
+    games = data.load_reference("games")
+    player_play = data.load_reference("player_play")
 
     # get premotioning player plays
     shifted = player_play["shiftSinceLineset"] == 1
@@ -397,71 +460,47 @@ def append_premotion_classification(force_calc: bool = False):
     pre_motion = player_play[shifted | motioned]
     pre_motion = pre_motion[["gameId", "playId", "nflId"]]
 
-    # iterate over each pre-motioning player play and compute all metrics
-    all_gids = pre_motion["gameId"].unique()
+    # iterate over each game and classify all of its pre-motioning player plays
+    #   | every game gets a table, even without pre-motion, so it is not recomputed
+    all_gids = games["gameId"].unique() if gids is None else gids
     for gid in tqdm.tqdm(all_gids, desc="Classifiying pre-motion player plays"):
-        tracking = data.load_tracking_adjusted(gid)
+        # if the game is already classified and force_calc is False, skip this game
+        if os.path.exists(_classification_path(gid)) and not force_calc:
+            continue
+
+        # get player play for this game
+        pre_motion_game = pre_motion[pre_motion["gameId"] == gid]
+
+        # only read the pre-motion plays and the columns used by the metric functions
+        tracking = data.load_tracking_adjusted(
+            gid,
+            play_ids=pre_motion_game["playId"].unique(),
+            columns=[
+                "playId",
+                "nflId",
+                "frameId",
+                "x",
+                "v_x",
+                "v_y",
+                MOTION_EVENT_COLUMN_NAME,
+            ],
+            sidecars=[MOTION_EVENT_COLUMN_NAME],
+        )
 
         # compute the speed to be used by metric functions
         tracking["s"] = np.sqrt(tracking["v_x"] ** 2 + tracking["v_y"] ** 2)
 
-        # get motion plays for this game
-        player_play_game_mask = player_play["gameId"] == gid
+        # only keep the pre-motioning players of these plays
+        pre_motion_keys = pre_motion_game[["playId", "nflId"]].astype(
+            {"nflId": tracking["nflId"].dtype}
+        )
+        tracking = pd.merge(tracking, pre_motion_keys, on=["playId", "nflId"])
 
-        # get player play for this game
-        pre_motion_game = pre_motion[pre_motion["gameId"] == gid]
+        # classify every pre-motioning player play of the game at once
+        motion_types = _classify_motions(_motion_features(tracking))
 
-        # iterate through each play
-        all_pids = pre_motion_game["playId"].unique()
-        for pid in all_pids:
-            # players plays for this play
-            pre_motion_play = pre_motion_game[pre_motion_game["playId"] == pid]
-
-            # get the tracking for this play
-            tracking_play = tracking[tracking["playId"] == pid]
-
-            # get the player play play mask
-            player_play_play_mask = player_play["playId"] == pid
-
-            # iterate through each player
-            all_nflids = pre_motion_play["nflId"].unique()
-            for nflid in all_nflids:
-                # get the frames for this player
-                player_play_player_mask = player_play["nflId"] == nflid
-
-                # get tracking for this play
-                tracking_player = tracking_play[tracking_play["nflId"] == nflid]
-
-                # get frames during motion
-                start_frame_df = tracking_player.loc[
-                    tracking_player[MOTION_EVENT_COLUMN_NAME] == "motion_start",
-                    "frameId",
-                ]
-                end_frame_df = tracking_player.loc[
-                    tracking_player[MOTION_EVENT_COLUMN_NAME] == "motion_end",
-                    "frameId",
-                ]
-
-                if not (len(start_frame_df) > 0 and len(end_frame_df) > 0):
-                    continue
-
-                start_frame = start_frame_df.iloc[0]
-                end_frame = end_frame_df.iloc[0]
-
-                # get tracking between these frames
-                tracking_frames = tracking_player[
-                    (tracking_player["frameId"] >= start_frame)
-                    & (tracking_player["frameId"] <= end_frame)
-                ]
-
-                motion_type = _classify_motion(tracking_frames)
-
-                player_play.loc[
-                    player_play_game_mask
-                    & player_play_play_mask
-                    & player_play_player_mask,
-                    CLASSIFICATION_COLUMN_NAME,
-                ] = motion_type
-
-    # write the new player play data
-    player_play.to_csv(os.path.join(data.DATA_DIR, "player_play.csv"))
+        # write the game's classification table
+        classification = motion_types.rename(CLASSIFICATION_COLUMN_NAME).reset_index()
+        classification.insert(0, "gameId", gid)
+        classification = classification.astype({"nflId": pre_motion["nflId"].dtype})
+        _write_classification(gid, classification)
@@ -1,89 +1,136 @@
+from concurrent.futures import ThreadPoolExecutor
 from . import data
+from . import kernels
 import os
 import pandas as pd
 import tqdm
 import numpy as np
 from scipy import optimize
-from scipy.special import gamma
+from scipy.special import expit, gamma
 
 
 SEPARATION_COLUMN_NAME = "separation"
 
+# name of the sidecar table holding the separation probability column
+SEPARATION_PROBABILITY_SIDECAR = "separation_probability"
+
 
 # ===================== #
 # SEPARATION DATA FILES #
 # ===================== #
 
 
-def _compute_separation_metric(
-    receiver: pd.DataFrame, defender: pd.DataFrame
-) -> pd.Series:
-    # compute the separation metric
-    separation_x = receiver["x"].values - defender["x"].values
-    separation_y = receiver["y"].values - defender["y"].values
-    separation = np.sqrt(separation_x**2 + separation_y**2)
+def _separation_tensor(receiver_xy: np.ndarray, defender_xy: np.ndarray) -> np.ndarray:
+    """
+    Compute the distance between every receiver and defender on every frame.
+
+    Takes `(frames, receivers, 2)` and `(frames, defenders, 2)` position arrays and returns a
+    `(frames, receivers, defenders)` array.
+    """
+    if kernels.numba_enabled():
+        return kernels.separation_tensor(receiver_xy, defender_xy)
+
+    diff = receiver_xy[:, :, np.newaxis, :] - defender_xy[:, np.newaxis, :, :]
+    return np.sqrt(np.sum(diff**2, axis=-1))
 
-    return separation
+
+def _play_separation(
+    tracking: pd.DataFrame,
+    pid: int,
+    receiverIds: np.ndarray,
+    defenderIds: np.ndarray,
+) -> pd.DataFrame:
+    """
+    Compute the separation of every receiver-defender pair over a play's frames.
+
+    The rows are ordered by receiver, then defender, then frame, and only the frames the
+    receiver was tracked on are kept.
+    """
+    frameIds = np.sort(tracking["frameId"].unique())
+    receiver_xy = data._play_array(tracking, receiverIds, frameIds, ["x", "y"])
+    defender_xy = data._play_array(tracking, defenderIds, frameIds, ["x", "y"])
+
+    # (frames, receivers, defenders) -> (receivers, defenders, frames)
+    separation = _separation_tensor(receiver_xy, defender_xy).transpose(1, 2, 0)
+    n_receivers, n_defenders, n_frames = separation.shape
+
+    # only keep the frames each receiver was tracked on
+    tracked = ~np.isnan(receiver_xy[:, :, 0]).T
+    tracked = np.broadcast_to(tracked[:, np.newaxis, :], separation.shape).ravel()
+
+    separation_frame = pd.DataFrame(
+        {
+            "frameId": np.tile(frameIds, n_receivers * n_defenders),
+            "playId": np.full(separation.size, pid),
+            "receiverId": np.repeat(receiverIds, n_defenders * n_frames),
+            "defenderId": np.tile(np.repeat(defenderIds, n_frames), n_receivers),
+            SEPARATION_COLUMN_NAME: separation.ravel(),
+        }
+    )
+    return separation_frame[tracked]
 
 
 def _separation_files_path(gid: int, sepbase_id: str = "main"):
     return os.path.join(data._PARQ_DIR, f"separation-metric-{sepbase_id}={gid}.parq")
 
 
-def _create_separation_files(recalc: bool = False, sepbase_id: str = "main"):
+def _create_separation_files(
+    recalc: bool = False, sepbase_id: str = "main", gids: list[int] | None = None
+):
     """
-    Create the separation files.
+    Create the separation file of every game which does not have one (every game if `recalc`).
 
     Pass a separation database ID if testing and wish to not overwrite the main.
+    Pass `gids` to only create the files for those games.
     """
-    # check if the files exist
-    path = _separation_files_path(2022090800, sepbase_id)
-    if not recalc and os.path.exists(path):
-        return
-
     # load in the data
-    games = pd.read_csv(os.path.join(data.DATA_DIR, "games.csv"))
-    plays = pd.read_csv(os.path.join(data.DATA_DIR, "plays.csv"))
-    player_play = pd.read_csv(os.path.join(data.DATA_DIR, "player_play.csv"))
-    players = pd.read_csv(os.path.join(data.DATA_DIR, "players.csv"))
+    games = data.load_reference("games")
+    all_gids = games["gameId"].unique() if gids is None else gids
+
+    # only the games missing their file are created (all of them if recalculating)
+    if not recalc:
+        all_gids = [
+            gid
+            for gid in all_gids
+            if not os.path.exists(_separation_files_path(gid, sepbase_id))
+        ]
+        if len(all_gids) == 0:
+            return
+
+    plays = data.load_reference("plays")
+    player_play = data.load_reference("player_play")
+    players = data.load_reference("players")
 
     # get position groups for player plays
     players = data.get_postion_groups(players)
     player_play = pd.merge(player_play, players[["nflId", "position_group"]])
 
     # iterate through each adjusted tracking game file
-    all_gids = games["gameId"].unique()
     for gid in tqdm.tqdm(all_gids, desc="Calculating separation data files"):
-        tracking = data.load_tracking_adjusted(gid)
-
-        # intialize the arrays
-        frame_array = np.array([])
-        plays_array = np.array([])
-        separation_array = np.array([])
-        receiver_array = np.array([])
-        defender_array = np.array([])
-
         # get plays for this game
         plays_game_mask = plays["gameId"] == gid
         plays_game = plays[plays_game_mask]
 
+        # only read the passing plays and the columns used for separation
+        dropback_pids = plays_game.loc[plays_game["isDropback"] == 1, "playId"]
+        tracking = data.index_tracking(
+            data.load_tracking_adjusted(
+                gid,
+                play_ids=dropback_pids,
+                columns=["playId", "nflId", "frameId", "x", "y", "event"],
+            )
+        )
+
+        # separation frames for each play
+        separation_frames = []
+
         # get only player play data for this game
         player_play_game_mask = player_play["gameId"] == gid
         player_play_game = player_play[player_play_game_mask]
 
-        # iterate over each play
-        all_pids = tracking["playId"].unique()
-        for pid in all_pids:
-            # get this play
-            play = plays_game[plays_game["playId"] == pid].squeeze()
-
-            # if not a passing play, continue to next play
-            if not play["isDropback"]:
-                continue
-
-            # get frames for this play
-            tracking_play_mask = tracking["playId"] == pid
-            tracking_play: pd.DataFrame = tracking[tracking_play_mask]
+        # iterate over each play (only the passing plays were loaded)
+        for pid in tracking.play_ids():
+            tracking_play = tracking.get_play(pid)
 
             # get player plays for this play
             player_play_play_mask = player_play_game["playId"] == pid
@@ -110,8 +157,7 @@ def _create_separation_files(recalc: bool = False, sepbase_id: str = "main"):
             # get the frames for the quarterback
             qb_mask = player_play_play["position_group"] == "quarterback"
             qbId = player_play_play.loc[qb_mask, "nflId"].values[0]
-            qb_mask = tracking_play["nflId"] == qbId
-            tracking_qb: pd.DataFrame = tracking_play[qb_mask]
+            tracking_qb: pd.DataFrame = tracking.get_player_play(pid, qbId)
 
             # get the index of snap and ball thrown, scramble, or sack
             snap_frame = tracking_qb.loc[
@@ -136,75 +182,33 @@ def _create_separation_files(recalc: bool = False, sepbase_id: str = "main"):
                     "autoevent_passinterrupted",
                 ]
             )
-            end_frame = tracking_qb.index[-1]
+            end_frame = tracking_qb["frameId"].iloc[-1]
             if sum(end_mask) > 0:
                 end_frame = tracking_qb.loc[
                     end_mask,
                     "frameId",
                 ].iloc[0]
 
-            # get the mask for only frames after snap and before end index
-            after_snap_mask = tracking_relevant["frameId"] >= snap_frame
-            before_end_mask = tracking_relevant["frameId"] <= end_frame
-
-            # get each receivers frames
-            receiver_frames = []
-            for receiver in receiverIds:
-                mask = tracking_relevant["nflId"] == receiver
-                tracking_receiver = tracking_relevant[
-                    mask & after_snap_mask & before_end_mask
-                ]
-                receiver_frames.append(tracking_receiver)
-
-            # get the defenders frames
-            defender_frames = []
-            for defender in defenderIds:
-                mask = tracking_relevant["nflId"] == defender
-                tracking_defender = tracking_relevant[
-                    mask & after_snap_mask & before_end_mask
-                ]
-                defender_frames.append(tracking_defender)
-
-            # create the frame dictionaries
-            receivers_dict = dict(zip(receiverIds, receiver_frames))
-            defenders_dict = dict(zip(defenderIds, defender_frames))
-
-            # calculate the separation for each receiver-defender combo
-            for receiverId, receiver in receivers_dict.items():
-                for defenderId, defender in defenders_dict.items():
-                    this_separation_array = _compute_separation_metric(
-                        receiver, defender
-                    )
-                    this_receiver_array = [
-                        receiverId for _ in range(len(this_separation_array))
-                    ]
-                    this_defender_array = [
-                        defenderId for _ in range(len(this_separation_array))
-                    ]
-                    this_plays_array = [pid for _ in range(len(this_separation_array))]
-                    frame_array = np.concatenate(
-                        (frame_array, receiver["frameId"].values)
-                    )
-                    separation_array = np.concatenate(
-                        (separation_array, this_separation_array)
-                    )
-                    receiver_array = np.concatenate(
-                        (receiver_array, this_receiver_array)
-                    )
-                    defender_array = np.concatenate(
-                        (defender_array, this_defender_array)
-                    )
-                    plays_array = np.concatenate((plays_array, this_plays_array))
+            # calculate the separation for each receiver-defender combo between snap and end
+            window_mask = tracking_relevant["frameId"].between(snap_frame, end_frame)
+            separation_frames.append(
+                _play_separation(
+                    tracking_relevant[window_mask], pid, receiverIds, defenderIds
+                )
+            )
 
         # create the separation dataframe
-        separation_frame = pd.DataFrame(
-            {
-                "frameId": frame_array,
-                "playId": plays_array,
-                "receiverId": receiver_array,
-                "defenderId": defender_array,
-                SEPARATION_COLUMN_NAME: separation_array,
-            }
+        columns = [
+            "frameId",
+            "playId",
+            "receiverId",
+            "defenderId",
+            SEPARATION_COLUMN_NAME,
+        ]
+        separation_frame = (
+            pd.concat(separation_frames, ignore_index=True)
+            if len(separation_frames) > 0
+            else pd.DataFrame(columns=columns)
         )
 
         # write to file
@@ -224,61 +228,72 @@ def _emp_dist_data_path(sepbase_id: str = "main"):
     return os.path.join(data._PARQ_DIR, f"separation-emp-dist-{sepbase_id}.parq")
 
 
-def _compute_emp_dist_data(recalc: bool = False, sepbase_id: str = "main"):
+def _load_separation_files(
+    gids: list[int], sepbase_id: str = "main", workers: int | None = None
+) -> pd.DataFrame:
+    """
+    Load and concatenate the separation files of the games, adding a gameId column.
+
+    The files are read on a thread pool with `workers` threads (serially if 1).
+    """
+
+    def load(gid: int) -> pd.DataFrame:
+        separation_data = pd.read_parquet(_separation_files_path(gid, sepbase_id))
+        separation_data.insert(0, "gameId", gid)
+        return separation_data
+
+    if workers == 1:
+        separation_frames = [load(gid) for gid in gids]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            separation_frames = list(executor.map(load, gids))
+
+    return pd.concat(separation_frames, ignore_index=True)
+
+
+def _compute_emp_dist_data(
+    recalc: bool = False, sepbase_id: str = "main", workers: int | None = None
+):
+    """
+    Get each defender's final separation on every targeted pass play, with the play's outcome.
+
+    Pass `workers` to set the number of threads reading the separation files.
+    """
     # check if the files exist
     path = _emp_dist_data_path(sepbase_id)
     if not recalc and os.path.exists(path):
         return
 
     # load in the data
-    games = pd.read_csv(os.path.join(data.DATA_DIR, "games.csv"))
-    player_play = pd.read_csv(os.path.join(data.DATA_DIR, "player_play.csv"))
+    games = data.load_reference("games")
+    player_play = data.load_reference("player_play")
 
     # get player play where player targetted
     was_target_mask = player_play["wasTargettedReceiver"] == 1
     player_play_target = player_play[was_target_mask]
+    pid_recep = player_play_target[
+        ["gameId", "playId", "hadPassReception"]
+    ].drop_duplicates()
 
-    # iterate through games
+    # load every game's separation data
     all_gids = games["gameId"].unique()
-    separation_dist_data = {"gameId": [], "playId": [], "values": [], "outcome": []}
-    for gid in tqdm.tqdm(
-        all_gids, desc="Getting empirical separation distribution data"
-    ):
-        # load the data
-        separation_data = pd.read_parquet(_separation_files_path(gid, sepbase_id))
-
-        # get player play target for this game
-        player_play_game_mask = player_play_target["gameId"] == gid
-        player_play_game = player_play_target[player_play_game_mask]
-
-        # iterate through each pass play
-        pid_recep = player_play_game[["playId", "hadPassReception"]].drop_duplicates()
-        for _, row in pid_recep.iterrows():
-            # check if the play is in the separation data
-            if not row["playId"] in separation_data["playId"]:
-                continue
+    separation_data = _load_separation_files(all_gids, sepbase_id, workers)
 
-            # get the separation data for this play
-            separation_play_mask = separation_data["playId"] == row["playId"]
-            separation_play = separation_data[separation_play_mask]
-
-            # iterate through each defender
-            all_defenders = separation_play["defenderId"].unique()
-            for defender in all_defenders:
-                # get the separation data for the defender
-                defender_mask = separation_play["defenderId"] == defender
-                separation_defender = separation_play[defender_mask]
+    # get the final separation calculation for each defender
+    #   | rows are ordered receiver -> defender -> frame, so this is the value of the
+    #   | play's last receiver on its last frame
+    separation_last = separation_data.drop_duplicates(
+        ["gameId", "playId", "defenderId"], keep="last"
+    )
 
-                # get the final separation calculation
-                separation_dist_data["values"].append(
-                    float(separation_defender[SEPARATION_COLUMN_NAME].values[-1])
-                )
-                separation_dist_data["playId"].append(row["playId"])
-                separation_dist_data["gameId"].append(gid)
-                separation_dist_data["outcome"].append(row["hadPassReception"])
+    # attach the outcome of each targeted play
+    dist_data = pd.merge(
+        separation_last[["gameId", "playId", SEPARATION_COLUMN_NAME]],
+        pid_recep,
+        on=["gameId", "playId"],
+    ).rename(columns={SEPARATION_COLUMN_NAME: "values", "hadPassReception": "outcome"})
 
-    # convert the dist data to a pd.DataFrame and write
-    dist_data = pd.DataFrame(separation_dist_data)
+    # write the dist data
     dist_data.to_parquet(_emp_dist_data_path(sepbase_id))
 
 
@@ -286,27 +301,102 @@ def _logig_func(x: pd.Series, a: float, b: float) -> pd.Series:
     return 2 * b / (1 + np.exp(a * x))
 
 
-def _compute_error(params: np.ndarray, emp_dist_data: pd.DataFrame) -> float:
+def _encode_emp_dist_data(
+    emp_dist_data: pd.DataFrame,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
-    Minimization objective function
+    Encode the empirical data once for the minimization objective.
+
+    Returns the separation values sorted by play, the offset of each play's first value and each
+    play's outcome. Rows without a separation or outcome are dropped.
+    """
+    # defenders missing the play's last frame have a NaN separation, which would make the
+    # play's product NaN, so those rows are left out
+    emp_dist_data = emp_dist_data.dropna(subset=["values", "outcome"])
+    emp_dist_data = emp_dist_data.sort_values(["gameId", "playId"], kind="stable")
+
+    # find where each play's rows start
+    keys = emp_dist_data[["gameId", "playId"]].to_numpy()
+    new_play = np.concatenate(([True], (keys[1:] != keys[:-1]).any(axis=1)))
+    starts = np.flatnonzero(new_play)
+
+    values = emp_dist_data["values"].to_numpy(dtype=float)
+    outcome = np.multiply.reduceat(
+        emp_dist_data["outcome"].to_numpy(dtype=float), starts
+    )
+
+    return values, starts, outcome
+
+
+def _product_of_others(probability: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """
+    Get the product of the other rows' probabilities of each row's play (without dividing by its own,
+    which can be 0).
+    """
+    # lay the plays out as the rows of a grid padded with ones
+    lengths = np.diff(np.append(starts, len(probability)))
+    play = np.repeat(np.arange(len(starts)), lengths)
+    position = np.arange(len(probability)) - np.repeat(starts, lengths)
+    grid = np.ones((len(starts), lengths.max() + 1))
+    grid[play, position + 1] = probability
+
+    # the product of the rows before and after each row
+    before = np.cumprod(grid, axis=1)[:, :-1]
+    after = np.cumprod(grid[:, :0:-1], axis=1)[:, ::-1]
+    after = np.hstack([after[:, 1:], np.ones((len(starts), 1))])
+    return (before * after)[play, position]
+
+
+def _compute_error(
+    params: np.ndarray, values: np.ndarray, starts: np.ndarray, outcome: np.ndarray
+) -> tuple[float, np.ndarray]:
+    """
+    Minimization objective function and its gradient with respect to `(a, b)`.
     """
     # get alpha and lambda_
     a = params[0]
     b = params[1]
 
-    # compute the pdf
-    emp_dist_data["probability"] = _logig_func(emp_dist_data["values"], a, b)
-
-    # get probability not defend
-    emp_dist_data["probability"] = 1 - emp_dist_data["probability"]
+    # get probability not defend, 1 - 2b / (1 + e^(ax))
+    defend = expit(-a * values)
+    probability = 1 - 2 * b * defend
 
-    # product out each probability
-    df = emp_dist_data.groupby(["gameId", "playId"]).prod()
+    # product out each probability as a sum of logs
+    #   | the correlation does not change with a shift, so use the play probability minus one,
+    #   | which stays precise when every probability is close to one
+    #   | (a probability of 0 gives log(0) = -inf, so the play probability is 0)
+    with np.errstate(divide="ignore"):
+        log_probability = np.log1p(-2 * b * defend)
+    play_probability_m1 = np.expm1(np.add.reduceat(log_probability, starts))
 
     # compute the correlation
-    error = 1 - np.corrcoef(df["outcome"].values, df["probability"].values)[0, 1]
+    outcome_centered = outcome - outcome.mean()
+    probability_centered = play_probability_m1 - play_probability_m1.mean()
+    outcome_ss = np.sum(outcome_centered**2)
+    probability_ss = np.sum(probability_centered**2)
+    corr = np.sum(outcome_centered * probability_centered) / np.sqrt(
+        outcome_ss * probability_ss
+    )
+    error = 1 - corr
+
+    # d corr / d play probability
+    dcorr = (
+        outcome_centered / np.sqrt(outcome_ss * probability_ss)
+        - corr * probability_centered / probability_ss
+    )
+
+    # d probability / d (a, b), then d play probability through the product
+    #   | each row's derivative times the product of the play's other probabilities,
+    #   | so a probability of 0 (a separation of 0 with b = 1) does not give 0 / 0
+    dprob_da = 2 * b * values * defend * expit(a * values)
+    dprob_db = -2 * defend
+    others = _product_of_others(probability, starts)
+    dplay_da = np.add.reduceat(dprob_da * others, starts)
+    dplay_db = np.add.reduceat(dprob_db * others, starts)
+
+    gradient = -np.array([np.sum(dcorr * dplay_da), np.sum(dcorr * dplay_db)])
 
-    return error
+    return error, gradient
 
 
 INITIAL_GUESS = [0.7, 1]
@@ -321,8 +411,16 @@ def _compute_emp_dist(sepbase_id: str = "main") -> list[float]:
 
     # find the minimum
     optimal = optimize.minimize(
-        fun=_compute_error, x0=INITIAL_GUESS, args=(emp_dist_data), bounds=bounds
+        fun=_compute_error,
+        x0=INITIAL_GUESS,
+        args=_encode_emp_dist_data(emp_dist_data),
+        jac=True,
+        bounds=bounds,
     )
+    if not np.isfinite(optimal.fun) or not np.isfinite(optimal.x).all():
+        raise ValueError(
+            f"Fitting the separation distribution did not converge ({optimal.message})"
+        )
 
     return optimal.x
 
@@ -352,7 +450,8 @@ def _compute_separation_probability(
 
 def append_separation_probability(force_calc: bool = False, sepbase_id: str = "main"):
     """
-    Calculate separation and append the separation column to the adjusted tracking data.
+    Calculate separation and write the separation column to the `separation_probability` sidecar.
+    Load it with `data.load_tracking_adjusted(gid, sidecars=["separation_probability"])`.
 
     Pass `force_calc = True` to force the separation column to be recalculated even if it exists.
     """
@@ -362,67 +461,69 @@ def append_separation_probability(force_calc: bool = False, sepbase_id: str = "m
     # create the empircal distribution files
     _compute_emp_dist_data(force_calc, sepbase_id)
 
+    # fit the distribution and write the column
+    _write_separation_probability(force_calc, sepbase_id)
+
+
+def _write_separation_probability(
+    force_calc: bool = False, sepbase_id: str = "main", gids: list[int] | None = None
+):
+    """
+    Fit the empirical distribution and write the separation probability column to the `separation_probability` sidecar.
+
+    The separation files and empirical distribution data must already exist.
+    """
     # compute the empircal distribution
     params = _compute_emp_dist(sepbase_id)
 
     # load in the data
-    games = pd.read_csv(os.path.join(data.DATA_DIR, "games.csv"))
+    games = data.load_reference("games")
 
     # iterate through each adjusted tracking game file
-    all_gids = games["gameId"].unique()
+    all_gids = games["gameId"].unique() if gids is None else gids
     with tqdm.tqdm(
         total=len(all_gids), desc="Calculating separation tracking column"
     ) as pbar:
         for gid in all_gids:
-            tracking = data.load_tracking_adjusted(gid)
-            separation_data = pd.read_parquet(_separation_files_path(gid, sepbase_id))
+            # if the separation sidecar already exists and force_calc is False, skip this game
+            sidecar_path = data._sidecar_path(SEPARATION_PROBABILITY_SIDECAR, gid)
+            if os.path.exists(sidecar_path) and not force_calc:
+                pbar.update(1)
+                continue
 
-            # if the separation column already exists and we do not force_calc is False, there is nothing more to be done - return
-            if SEPARATION_COLUMN_NAME in tracking.columns and not force_calc:
-                pbar.n = len(all_gids)
-                pbar.last_print_n = len(all_gids)
-                pbar.update(0)
-                return
+            tracking = data.load_tracking_adjusted(gid, columns=data.FRAME_KEYS)
+            separation_data = pd.read_parquet(_separation_files_path(gid, sepbase_id))
 
             # compute the separation probability
             separation_data = _compute_separation_probability(
                 separation_data, params
             ).reset_index()
 
-            # initialize separation column
-            tracking[SEPARATION_COLUMN_NAME] = None
-
-            # iterate over each play
-            all_pids = separation_data["playId"].unique()
-            for pid in all_pids:
-                # compute the tracking play mask
-                tracking_play_mask = tracking["playId"] == pid
-
-                # get separation metric for this play
-                separation_play_mask = separation_data["playId"] == pid
-                separation_play = separation_data[separation_play_mask]
+            # join the probability of each receiver frame onto the tracking rows
+            separation_data = separation_data.rename(
+                columns={"receiverId": "nflId", "probability": SEPARATION_COLUMN_NAME}
+            ).astype({"nflId": tracking["nflId"].dtype})
+            n_rows = len(tracking)
+            tracking = pd.merge(
+                tracking,
+                separation_data,
+                how="left",
+                on=data.FRAME_KEYS,
+                validate="1:1",
+            )
 
-                # create the frame Id mask
-                tracking_frame_mask = tracking["frameId"].isin(
-                    separation_play["frameId"].unique()
+            # every tracking row is kept once and every separation frame must find its row
+            if len(tracking) != n_rows:
+                raise ValueError(
+                    f"Separation write-back changed the row count of game {gid}"
+                )
+            n_matched = tracking[SEPARATION_COLUMN_NAME].notna().sum()
+            n_expected = separation_data[SEPARATION_COLUMN_NAME].notna().sum()
+            if n_matched != n_expected:
+                raise ValueError(
+                    f"{n_expected - n_matched} separation frame(s) of game {gid} have no tracking row"
                 )
-
-                # iterate through each receiver
-                all_receivers = separation_play["receiverId"].unique()
-                for receiver in all_receivers:
-                    separation = separation_play[
-                        separation_play["receiverId"] == receiver
-                    ]
-
-                    # set the tracking data separation column
-                    tracking_receiver_mask = tracking["nflId"] == receiver
-                    tracking.loc[
-                        tracking_play_mask
-                        & tracking_receiver_mask
-                        & tracking_frame_mask,
-                        SEPARATION_COLUMN_NAME,
-                    ] = separation["probability"].values
             pbar.update(1)
 
-            # write the new adjusted tracking data with the separation column
-            tracking.to_parquet(data.tracking_adjusted_path(gid))
+            # write the separation column to the game's sidecar table
+            data._write_sidecar(SEPARATION_PROBABILITY_SIDECAR, gid, tracking)
@@ -1,4 +1,5 @@
 from . import data
+from . import kernels
 import os
 import pandas as pd
 import tqdm
@@ -7,6 +8,9 @@ import numpy as np
 
 SEPARATION_COLUMN_NAME = "separation"
 
+# name of the sidecar table holding the separation metric column
+SEPARATION_METRIC_SIDECAR = "separation_metric"
+
 # in yards per frame
 PASS_SPEED = 2
 
@@ -14,102 +18,146 @@ PASS_SPEED = 2
 QB_DROP_BACK = 5
 
 
+# columns of the play arrays passed to the separation metric
+_PLAYER_COLUMNS = ["x", "y", "v_x", "v_y", "a_x", "a_y"]
+
+
 def _compute_separation_metric(
-    receiver: pd.DataFrame, defender: pd.DataFrame
+    receiver: np.ndarray, defender: np.ndarray
 ) -> np.ndarray:
+    """
+    Compute the separation metric of every receiver-defender pair on every frame.
+
+    Takes `(frames, receivers, 6)` and `(frames, defenders, 6)` arrays of `_PLAYER_COLUMNS`
+    and returns a `(frames, receivers, defenders)` array.
+    """
+    if kernels.numba_enabled():
+        return kernels.separation_metric(receiver, defender, PASS_SPEED, QB_DROP_BACK)
+
+    rx, ry, rv_x, rv_y, ra_x, ra_y = np.moveaxis(receiver, -1, 0)
+    dx, dy, dv_x, dv_y = np.moveaxis(defender[:, :, :4], -1, 0)
+
     # compute theoretical pass time
-    pass_distance = np.sqrt(
-        receiver["x"].values ** 2 + (receiver["y"].values - QB_DROP_BACK) ** 2
-    )
+    pass_distance = np.sqrt(rx**2 + (ry - QB_DROP_BACK) ** 2)
     t_frame = pass_distance / PASS_SPEED
     t_sec = t_frame / 10
 
     # exptrapolate x and y
-    x_extrap = (
-        receiver["x"].values
-        + receiver["v_x"].values * t_sec
-        + 0.5 * receiver["a_x"].values * t_sec**2
-    )
-    y_extrap = (
-        receiver["y"].values
-        + receiver["v_y"].values * t_sec
-        + 0.5 * receiver["a_y"].values * t_sec**2
-    )
+    x_extrap = rx + rv_x * t_sec + 0.5 * ra_x * t_sec**2
+    y_extrap = ry + rv_y * t_sec + 0.5 * ra_y * t_sec**2
+
+    # broadcast receivers against defenders: (frames, receivers, 1) vs (frames, 1, defenders)
+    x_extrap, y_extrap = x_extrap[:, :, np.newaxis], y_extrap[:, :, np.newaxis]
+    rx, ry = rx[:, :, np.newaxis], ry[:, :, np.newaxis]
+    dx, dy = dx[:, np.newaxis, :], dy[:, np.newaxis, :]
+    dv_x, dv_y = dv_x[:, np.newaxis, :], dv_y[:, np.newaxis, :]
 
     # vector from defender to receivers extrapolation
-    dir_x = x_extrap - defender["x"].values
-    dir_y = y_extrap - defender["y"].values
+    dir_x = x_extrap - dx
+    dir_y = y_extrap - dy
     magnitude = np.sqrt(dir_x**2 + dir_y**2)
     ux = dir_x / magnitude
     uy = dir_y / magnitude
 
     # compute the relative velocity
-    rvelo_x = ux * defender["v_x"].values
-    rvelo_y = uy * defender["v_y"].values
+    rvelo_x = ux * dv_x
+    rvelo_y = uy * dv_y
     rvelo = rvelo_x + rvelo_y
 
     # devide by the distance squared
-    separation = rvelo / (
-        (receiver["x"].values - defender["x"].values) ** 2
-        + (receiver["y"].values - defender["y"].values) ** 2
-    )
+    separation = rvelo / ((rx - dx) ** 2 + (ry - dy) ** 2)
 
     return separation
 
 
-def append_separation_metric(force_calc: bool = False, sepbase_id: str = "main"):
+def _play_separation_metric(
+    tracking: pd.DataFrame, receiverIds: np.ndarray, defenderIds: np.ndarray
+) -> np.ndarray:
+    """
+    Compute each receiver's separation metric summed over the defenders, for each row of a play.
+
+    Rows that are not receivers, and frames where no defender is tracked, are NaN.
+    """
+    frameIds = np.sort(tracking["frameId"].unique())
+    receiver = data._play_array(tracking, receiverIds, frameIds, _PLAYER_COLUMNS)
+    defender = data._play_array(tracking, defenderIds, frameIds, _PLAYER_COLUMNS)
+
+    # sum over the defenders tracked on each frame
+    defender_tracked = ~np.isnan(defender[:, :, 0])
+    separation = np.sum(
+        _compute_separation_metric(receiver, defender),
+        axis=2,
+        where=defender_tracked[:, np.newaxis, :],
+    )
+    separation[~defender_tracked.any(axis=1)] = np.nan
+
+    # map the (frames, receivers) values back onto the play's rows
+    frame_index, player_index = data._play_array_index(tracking, receiverIds, frameIds)
+    receiver_rows = player_index >= 0
+    separation_rows = np.full(len(tracking), np.nan)
+    separation_rows[receiver_rows] = separation[
+        frame_index[receiver_rows], player_index[receiver_rows]
+    ]
+
+    return separation_rows
+
+
+def append_separation_metric(
+    force_calc: bool = False, sepbase_id: str = "main", gids: list[int] | None = None
+):
     """
-    Calculate separation and append the separation column to the adjusted tracking data.
+    Calculate separation and write the separation column to the `separation_metric` sidecar.
+    Load it with `data.load_tracking_adjusted(gid, sidecars=["separation_metric"])`.
 
     Pass `force_calc = True` to force the separation column to be recalculated even if it exists.
+    Pass `gids` to only process those games.
     """
     # load in the data
-    games = pd.read_csv(os.path.join(data.DATA_DIR, "games.csv"))
-    plays = pd.read_csv(os.path.join(data.DATA_DIR, "plays.csv"))
-    player_play = pd.read_csv(os.path.join(data.DATA_DIR, "player_play.csv"))
-    players = pd.read_csv(os.path.join(data.DATA_DIR, "players.csv"))
+    games = data.load_reference("games")
+    plays = data.load_reference("plays")
+    player_play = data.load_reference("player_play")
+    players = data.load_reference("players")
 
     # get position groups for player plays
     players = data.get_postion_groups(players)
     player_play = pd.merge(player_play, players[["nflId", "position_group"]])
 
     # iterate through each adjusted tracking game file
-    all_gids = games["gameId"].unique()
+    all_gids = games["gameId"].unique() if gids is None else gids
     with tqdm.tqdm(
         total=len(all_gids), desc="Calculating separation tracking column"
     ) as pbar:
         for gid in all_gids:
-            tracking = data.load_tracking_adjusted(gid)
-
-            # if the separation column already exists and we do not force_calc is False, there is nothing more to be done - return
-            if SEPARATION_COLUMN_NAME in tracking.columns and not force_calc:
-                pbar.n = len(all_gids)
-                pbar.last_print_n = len(all_gids)
-                pbar.update(0)
-                return
+            # if the separation sidecar already exists and force_calc is False, skip this game
+            sidecar_path = data._sidecar_path(SEPARATION_METRIC_SIDECAR, gid)
+            if os.path.exists(sidecar_path) and not force_calc:
+                pbar.update(1)
+                continue
 
             # get plays for this game
             plays_game_mask = plays["gameId"] == gid
             plays_game = plays[plays_game_mask]
 
+            # only read the passing plays
+            dropback_pids = plays_game.loc[plays_game["isDropback"] == 1, "playId"]
+            tracking_index = data.index_tracking(
+                data.load_tracking_adjusted(
+                    gid,
+                    play_ids=dropback_pids,
+                    columns=data.FRAME_KEYS + _PLAYER_COLUMNS,
+                )
+            )
+            tracking = tracking_index.tracking
+
+            # initialize separation column
+            separation = np.full(len(tracking), np.nan)
+
             # get only player play data for this game
             player_play_game_mask = player_play["gameId"] == gid
             player_play_game = player_play[player_play_game_mask]
 
             # iterate over each play
-            all_pids = tracking["playId"].unique()
-            for pid in all_pids:
-                # get this play
-                play = plays_game[plays_game["playId"] == pid].squeeze()
-
-                # if not a passing play, continue to next play
-                if not play["isDropback"]:
-                    continue
-
-                # get frames for this play
-                tracking_play_mask = tracking["playId"] == pid
-                tracking_play: pd.DataFrame = tracking[tracking_play_mask]
-
+            for pid, rows in tracking_index.plays.items():
                 # get player plays for this play
                 player_play_play_mask = player_play_game["playId"] == pid
                 player_play_play: pd.DataFrame = player_play_game[player_play_play_mask]
@@ -126,54 +174,19 @@ def append_separation_metric(force_calc: bool = False, sepbase_id: str = "main")
                 )
                 defenderIds = player_play_play.loc[defender_mask, "nflId"].values
 
-                # get frames for relevant players
-                players_mask = tracking_play["nflId"].isin(
-                    np.concatenate((receiverIds, defenderIds))
+                # calculate the separation for each receiver against all defenders at once
+                separation[rows] = _play_separation_metric(
+                    tracking_index.get_play(pid), receiverIds, defenderIds
                 )
-                tracking_relevant = tracking_play[players_mask]
-
-                # get each receivers frames
-                receiver_frames = []
-                for receiver in receiverIds:
-                    tracking_receiver = tracking_relevant[
-                        tracking_relevant["nflId"] == receiver
-                    ]
-                    receiver_frames.append(tracking_receiver)
-
-                # get the defenders frames
-                defender_frames = []
-                for defender in defenderIds:
-                    tracking_defender = tracking_relevant[
-                        tracking_relevant["nflId"] == defender
-                    ]
-                    defender_frames.append(tracking_defender)
-
-                # create the frame dictionaries
-                receivers_dict = dict(zip(receiverIds, receiver_frames))
-                defenders_dict = dict(zip(defenderIds, defender_frames))
-
-                # calculate the separation for each receiver-defender combo
-                for receiverId, receiver in receivers_dict.items():
-                    separation_array = None
-                    for defender in defenders_dict.values():
-                        this_separation_array = _compute_separation_metric(
-                            receiver, defender
-                        )
-
-                        if isinstance(separation_array, np.ndarray):
-                            separation_array += this_separation_array
-                        else:
-                            separation_array = this_separation_array
-
-                    # append the separation to the tracking data
-                    tracking_player_mask = tracking["nflId"] == receiverId
-                    tracking.loc[
-                        tracking_play_mask & tracking_player_mask,
-                        SEPARATION_COLUMN_NAME,
-                    ] = separation_array
+
+            tracking[SEPARATION_COLUMN_NAME] = separation
 
             # update the progress bar
             pbar.update(1)
 
-            # write the new adjusted tracking data with the separation column
-            tracking.to_parquet(data.tracking_adjusted_path(gid))
+            # write the separation column to the game's sidecar table
+            data._write_sidecar(
+                SEPARATION_METRIC_SIDECAR,
+                gid,
+                tracking[data.FRAME_KEYS + [SEPARATION_COLUMN_NAME]],
+            )
@@ -0,0 +1,47 @@
+import numpy as np
+from scipy.interpolate import splev, splrep
+
+
+# ========================= #
+# Batched Smoothing Splines #
+# ========================= #
+
+#   | Smooths many concatenated curves (e.g. the speed of every motion player of
+#   | a game) and returns the splines and their derivatives as flat arrays, so
+#   | the motion detection rules can be applied to every curve at once. Each
+#   | curve is fit with FITPACK's curfit (splrep), the same routine scipy's
+#   | UnivariateSpline runs, so the knots, the fit and the derivatives are the
+#   | same as UnivariateSpline's. splrep/splev skip building a spline object and
+#   | one derivative spline per order, which is where most of the per curve time
+#   | of UnivariateSpline goes.
+
+
+# degree of the splines (cubic, as UnivariateSpline's default)
+DEGREE = 3
+
+
+def smooth_derivatives(
+    frame_ids: np.ndarray,
+    values: np.ndarray,
+    new_curve: np.ndarray,
+    smoothing_param: float,
+    order: int = 3,
+) -> list[np.ndarray]:
+    """
+    Fit a smoothing spline to each of the concatenated curves and evaluate it and its derivatives at every frame.
+
+    The rows of each curve must be sorted by frameId (at least 4 per curve), and `new_curve` marks the first row of each.
+    Returns `[spline, 1st derivative, ..., order-th derivative]` (per frame, like `UnivariateSpline.derivative`).
+    """
+    x = np.asarray(frame_ids, dtype=float)
+    values = np.asarray(values, dtype=float)
+    derivatives = [np.empty(len(x)) for _ in range(order + 1)]
+
+    starts = np.flatnonzero(new_curve)
+    stops = np.append(starts[1:], len(x))
+    for start, stop in zip(starts, stops):
+        tck = splrep(x[start:stop], values[start:stop], k=DEGREE, s=smoothing_param)
+        for derivative, out in enumerate(derivatives):
+            out[start:stop] = splev(x[start:stop], tck, der=derivative)
+
+    return derivatives
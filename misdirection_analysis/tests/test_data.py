@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from .. import data
+
+
+def _tracking() -> pd.DataFrame:
+    """
+    Get a game's raw tracking with a player and the football on two plays.
+    """
+    rows = []
+    for pid in [56, 80]:
+        for name in ["player", "football"]:
+            for frame_id in range(1, 4):
+                rows.append(
+                    {
+                        "gameId": 2022090800,
+                        "playId": pid,
+                        "displayName": name,
+                        "frameId": frame_id,
+                        "event": "ball_snap" if frame_id == 2 else None,
+                        "playDirection": "left" if pid == 80 else "right",
+                        "x": 30.0 + frame_id,
+                        "y": 20.0,
+                        "o": 90.0,
+                        "dir": 180.0,
+                    }
+                )
+    return pd.DataFrame(rows)
+
+
+def _plays() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "gameId": [2022090800, 2022090800],
+            "playId": [56, 80],
+            "absoluteYardlineNumber": [35.0, 40.0],
+        }
+    )
+
+
+def test_clean_coords():
+    tracking = data._clean_coords(_tracking(), _plays())
+
+    # x and y are swapped, relative to the football's y and the line of scrimmage
+    play = tracking[tracking["playId"] == 56]
+    np.testing.assert_allclose(play["y"], [-4.0, -3.0, -2.0] * 2)
+    np.testing.assert_allclose(play["x"], 0.0)
+    flipped = tracking[tracking["playId"] == 80]
+    np.testing.assert_allclose(flipped["y"], [9.0, 8.0, 7.0] * 2)
+
+
+def test_clean_coords_drops_plays_without_offsets():
+    plays = _plays()
+    plays.loc[1, "absoluteYardlineNumber"] = np.nan
+
+    tracking = data._clean_coords(_tracking(), plays)
+
+    assert set(tracking["playId"]) == {56}
+
+
+def test_clean_coords_duplicated_play():
+    plays = pd.concat([_plays(), _plays().iloc[[1]]], ignore_index=True)
+
+    with pytest.raises(ValueError, match=r"more than one row for the plays \[80\]"):
+        data._clean_coords(_tracking(), plays)
+
+
+def test_load_tracking_adjusted_repeated_sidecar_column(monkeypatch, tmp_path):
+    path = tmp_path / "part-0.parq"
+    path.touch()
+    keys = pd.DataFrame({"playId": [56], "nflId": [1.0], "frameId": [1]})
+    monkeypatch.setattr(data, "tracking_adjusted_path", lambda gid: str(path))
+    monkeypatch.setattr(data, "_read_tracking", lambda *args: keys.assign(x=0.0))
+    monkeypatch.setattr(
+        data, "_read_sidecar", lambda name, *args: keys.assign(separation=1.0)
+    )
+
+    tracking = data.load_tracking_adjusted(2022090800, sidecars=["separation_metric"])
+    assert list(tracking.columns) == data.FRAME_KEYS + ["x", "separation"]
+
+    # both separation sidecars provide a separation column
+    with pytest.raises(
+        ValueError, match=r"separation_metric sidecar provides \['separation'\]"
+    ):
+        data.load_tracking_adjusted(
+            2022090800, sidecars=["separation_probability", "separation_metric"]
+        )
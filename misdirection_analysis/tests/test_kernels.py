@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from .. import kernels
+from .. import separation
+from .. import separation_metric
+
+pytest.importorskip("numba")
+
+
+# the compiled loops may round differently than NumPy's vectorized operations
+RTOL = 1e-12
+
+
+def _both_paths(monkeypatch, function, *args):
+    """
+    Run `function` with the compiled kernels and with the NumPy versions.
+    """
+    monkeypatch.setattr(kernels, "USE_NUMBA", True)
+    assert kernels.numba_enabled()
+    compiled = function(*args)
+    monkeypatch.setattr(kernels, "USE_NUMBA", False)
+    numpy = function(*args)
+    return compiled, numpy
+
+
+def _player_arrays(n_frames: int, n_players: int, seed: int) -> np.ndarray:
+    """
+    Get a `(frames, players, 6)` array of x, y, v_x, v_y, a_x, a_y with missing frames and NaN.
+    """
+    rng = np.random.default_rng(seed)
+    values = rng.normal(0, 5, (n_frames, n_players, 6))
+
+    # players missing frames (every column NaN) and a NaN acceleration on the first frame
+    values[rng.random((n_frames, n_players)) < 0.2] = np.nan
+    values[0, :, 4:] = np.nan
+    return values
+
+
+def _play(seed: int) -> pd.DataFrame:
+    """
+    Get a play's tracking rows where some players are missing frames and some values are NaN.
+    """
+    rng = np.random.default_rng(seed)
+    frame_ids, nfl_ids = np.arange(1, 31), np.arange(1, 8, dtype=float)
+    rows = pd.MultiIndex.from_product([nfl_ids, frame_ids], names=["nflId", "frameId"])
+    tracking = pd.DataFrame(
+        rng.normal(0, 5, (len(rows), 6)),
+        index=rows,
+        columns=separation_metric._PLAYER_COLUMNS,
+    ).reset_index()
+    tracking["playId"] = 56
+
+    # drop frames of a receiver and a defender, and leave a defender without a velocity
+    tracking = tracking[
+        ~(
+            ((tracking["nflId"] == 2) & tracking["frameId"].between(10, 14))
+            | ((tracking["nflId"] == 5) & (tracking["frameId"] > 25))
+        )
+    ].reset_index(drop=True)
+    tracking.loc[(tracking["nflId"] == 6) & (tracking["frameId"] == 3), "v_x"] = np.nan
+
+    # a defender on top of a receiver (zero distance)
+    on_top = (tracking["nflId"] == 7) & (tracking["frameId"] == 8)
+    receiver = (tracking["nflId"] == 1) & (tracking["frameId"] == 8)
+    tracking.loc[on_top, ["x", "y"]] = tracking.loc[receiver, ["x", "y"]].to_numpy()
+    return tracking
+
+
+RECEIVER_IDS = np.array([1.0, 2.0, 3.0])
+DEFENDER_IDS = np.array([4.0, 5.0, 6.0, 7.0])
+
+
+def test_separation_tensor(monkeypatch):
+    receiver = _player_arrays(40, 3, seed=0)[:, :, :2]
+    defender = _player_arrays(40, 5, seed=1)[:, :, :2]
+
+    compiled, numpy = _both_paths(
+        monkeypatch, separation._separation_tensor, receiver, defender
+    )
+
+    assert compiled.shape == numpy.shape == (40, 3, 5)
+    assert np.isnan(numpy).any()
+    np.testing.assert_allclose(compiled, numpy, rtol=RTOL, equal_nan=True)
+
+
+def test_separation_metric(monkeypatch):
+    receiver = _player_arrays(40, 3, seed=2)
+    defender = _player_arrays(40, 5, seed=3)
+    defender[5, 1, :2] = receiver[5, 0, :2]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        compiled, numpy = _both_paths(
+            monkeypatch,
+            separation_metric._compute_separation_metric,
+            receiver,
+            defender,
+        )
+
+    assert compiled.shape == numpy.shape == (40, 3, 5)
+    assert np.isnan(numpy).any()
+    np.testing.assert_allclose(compiled, numpy, rtol=RTOL, equal_nan=True)
+
+
+def test_play_separation(monkeypatch):
+    tracking = _play(seed=4)
+
+    compiled, numpy = _both_paths(
+        monkeypatch,
+        separation._play_separation,
+        tracking,
+        56,
+        RECEIVER_IDS,
+        DEFENDER_IDS,
+    )
+
+    # the receiver's missing frames are not kept
+    assert len(numpy) == (30 * 3 - 5) * 4
+    pd.testing.assert_frame_equal(compiled, numpy, rtol=RTOL)
+
+
+def test_play_separation_metric(monkeypatch):
+    tracking = _play(seed=5)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        compiled, numpy = _both_paths(
+            monkeypatch,
+            separation_metric._play_separation_metric,
+            tracking,
+            RECEIVER_IDS,
+            DEFENDER_IDS,
+        )
+
+    assert np.isnan(numpy).any() and np.isfinite(numpy).any()
+    np.testing.assert_allclose(compiled, numpy, rtol=RTOL, equal_nan=True)
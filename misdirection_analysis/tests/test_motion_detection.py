@@ -0,0 +1,129 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import numpy as np
+import pandas as pd
+from scipy.interpolate import UnivariateSpline
+
+from .. import motion_detection
+from .. import smoothing
+
+
+def _speed_curve(rng: np.random.Generator, n_frames: int) -> np.ndarray:
+    """
+    Get a noisy speed curve: standing still, then speeding up to a top speed (a player going in motion).
+    """
+    start = rng.integers(5, n_frames - 12)
+    progress = np.clip((np.arange(n_frames) - start) / rng.uniform(6, 15), 0, 1)
+    speed = rng.uniform(2, 6) * progress**2 * (3 - 2 * progress)
+    return np.abs(speed + rng.normal(0, rng.choice([0.01, 0.03, 0.06]), n_frames))
+
+
+def test_smooth_derivatives_matches_univariate_spline():
+    rng = np.random.default_rng(0)
+    curves = [_speed_curve(rng, rng.integers(25, 90)) for _ in range(100)]
+    frame_ids = np.concatenate([np.arange(1, len(curve) + 1) for curve in curves])
+    new_curve = frame_ids == 1
+
+    derivatives = smoothing.smooth_derivatives(
+        frame_ids, np.concatenate(curves), new_curve, motion_detection.SMOOTHING_PARAM
+    )
+
+    # the same FITPACK fit, so the splines agree up to rounding
+    starts = np.flatnonzero(new_curve)
+    for start, curve in zip(starts, curves):
+        rows = slice(start, start + len(curve))
+        spline = UnivariateSpline(
+            frame_ids[rows], curve, s=motion_detection.SMOOTHING_PARAM
+        )
+        expected = [spline(frame_ids[rows])] + [
+            spline.derivative(order)(frame_ids[rows]) for order in [1, 2, 3]
+        ]
+        for values, expected_values in zip(derivatives, expected):
+            np.testing.assert_allclose(
+                values[rows], expected_values, rtol=1e-12, atol=1e-12
+            )
+
+
+def _game(seed: int) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Get a game's tracking, plays and player play rows with two motion players per play.
+    """
+    rng = np.random.default_rng(seed)
+    tracking, plays, player_play = [], [], []
+    for pid in range(1, 21):
+        n_frames = rng.integers(40, 100)
+        frame_ids = np.arange(1, n_frames + 1)
+        snap_frame = n_frames - 5
+        plays.append((pid, "A"))
+        for nflid in range(1, 8):
+            club = "A" if nflid <= 5 else "B"
+            motion = nflid <= 2
+            if motion:
+                speed = _speed_curve(rng, n_frames)
+            else:
+                # walking out of the huddle then set
+                speed = np.abs(
+                    np.clip(1.5 - frame_ids / 10, 0, None)
+                    + rng.normal(0, 0.02, n_frames)
+                )
+            y = np.clip(-12 + frame_ids / 2, None, -1) + rng.normal(0, 0.1, n_frames)
+            event = np.where(frame_ids == snap_frame, "ball_snap", None)
+            tracking.append(
+                pd.DataFrame(
+                    {
+                        "playId": pid,
+                        "nflId": float(nflid),
+                        "frameId": frame_ids,
+                        "club": club,
+                        "y": y,
+                        "s": speed,
+                        "event": event,
+                    }
+                )
+            )
+            player_play.append((pid, nflid, int(motion)))
+
+    return (
+        pd.concat(tracking, ignore_index=True),
+        pd.DataFrame(plays, columns=["playId", "possessionTeam"]),
+        pd.DataFrame(player_play, columns=["playId", "nflId", "motionSinceLineset"]),
+    )
+
+
+def test_batched_engine_matches_spline_engine(monkeypatch):
+    tracking, plays, player_play = _game(seed=1)
+
+    events = {}
+    for engine in ["spline", "batched"]:
+        monkeypatch.setattr(motion_detection, "SMOOTHING_ENGINE", engine)
+        events[engine] = motion_detection._motion_events(tracking, plays, player_play)
+
+    # the lineset, motion start and motion end frames are exactly the same
+    assert (events["spline"] == "motion_start").sum() > 10
+    assert (events["spline"] == "lineset").any()
+    assert (events["batched"] == events["spline"]).all()
+
+
+def test_smoothing_param_is_used(monkeypatch):
+    tracking, plays, player_play = _game(seed=1)
+    default = motion_detection._motion_events(tracking, plays, player_play)
+
+    monkeypatch.setattr(motion_detection, "SMOOTHING_PARAM", 50.0)
+    smoother = motion_detection._motion_events(tracking, plays, player_play)
+
+    assert (smoother != default).any()
+
+
+def test_workers_use_the_parent_parameters(monkeypatch):
+    monkeypatch.setattr(motion_detection, "SMOOTHING_PARAM", 0.8)
+    monkeypatch.setattr(motion_detection, "SMOOTHING_ENGINE", "batched")
+    params = motion_detection._params()
+
+    # spawned workers import the module with the default parameters
+    with ProcessPoolExecutor(
+        max_workers=1,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=motion_detection._init_motion_worker,
+        initargs=(params,),
+    ) as executor:
+        assert executor.submit(motion_detection._params).result() == params
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from .. import separation
+
+
+def _emp_dist_data(seed: int) -> pd.DataFrame:
+    """
+    Get the final separation of each defender on targeted plays, with a defender on top of a receiver.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for pid in range(1, 81):
+        values = rng.gamma(2, 2, rng.integers(1, 5))
+        outcome = int(rng.random() < 1 - np.exp(-values.min() / 2))
+        rows += [(2022090800, pid, value, outcome) for value in values]
+    emp_dist_data = pd.DataFrame(
+        rows, columns=["gameId", "playId", "values", "outcome"]
+    )
+    emp_dist_data.loc[0, "values"] = 0.0
+    return emp_dist_data
+
+
+def _pandas_error(params: np.ndarray, emp_dist_data: pd.DataFrame) -> float:
+    """
+    The objective as a groupby product of each play's probabilities.
+    """
+    probability = 1 - separation._logig_func(emp_dist_data["values"], *params)
+    play_probability = probability.groupby(
+        [emp_dist_data["gameId"], emp_dist_data["playId"]]
+    ).prod()
+    outcome = emp_dist_data.groupby(["gameId", "playId"])["outcome"].first()
+    return 1 - np.corrcoef(outcome, play_probability)[0, 1]
+
+
+def test_gradient_with_a_zero_separation():
+    emp_dist_data = _emp_dist_data(seed=0)
+    encoded = separation._encode_emp_dist_data(emp_dist_data)
+
+    for params in [np.array([0.7, 0.999999]), np.array([0.3, 0.5])]:
+        error, gradient = separation._compute_error(params, *encoded)
+        assert np.isclose(error, _pandas_error(params, emp_dist_data), rtol=1e-10)
+
+        # central differences
+        step = 1e-7
+        differences = [
+            (
+                separation._compute_error(params + delta, *encoded)[0]
+                - separation._compute_error(params - delta, *encoded)[0]
+            )
+            / (2 * step)
+            for delta in np.eye(2) * step
+        ]
+        np.testing.assert_allclose(gradient, differences, rtol=1e-4, atol=1e-8)
+
+    # a probability of 0 (b = 1) still gives a finite objective and gradient
+    error, gradient = separation._compute_error(np.array([0.7, 1.0]), *encoded)
+    assert np.isfinite(error) and np.isfinite(gradient).all()
+
+
+def test_fit_with_a_zero_separation(monkeypatch, tmp_path):
+    path = str(tmp_path / "emp-dist.parq")
+    monkeypatch.setattr(separation, "_emp_dist_data_path", lambda _: path)
+    emp_dist_data = _emp_dist_data(seed=1)
+    emp_dist_data.to_parquet(path)
+
+    params = separation._compute_emp_dist()
+
+    assert np.isfinite(params).all()
+    assert _pandas_error(params, emp_dist_data) <= _pandas_error(
+        np.array(separation.INITIAL_GUESS), emp_dist_data
+    )
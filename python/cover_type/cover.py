@@ -16,7 +16,7 @@ def detect_cover(
     if not isinstance(tracking, pd.DataFrame):
         tracking = data.load_tracking(gid)
     if not isinstance(plays, pd.DataFrame):
-        plays = pd.read_csv("data/plays.csv")
+        plays = data.load_plays()
 
     # get frames for the current play
     this_game = tracking["gameId"] == gid
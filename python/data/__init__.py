@@ -1 +1,3 @@
-from .data import load_tracking
\ No newline at end of file
+from .data import load_tracking
+from .data import load_plays
+from .data import load_players
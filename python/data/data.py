@@ -1,9 +1,11 @@
+import functools
 import pandas
 import os
 import tqdm
 
 
 _DATA_DIR = os.path.join(os.path.dirname(__file__), "../../data/parqs/")
+_CSV_DIR = os.path.join(os.path.dirname(__file__), "../../data/")
 
 
 def _create_tracking_week(week: int):
@@ -28,3 +30,23 @@ def load_tracking(gid: int) -> pandas.DataFrame:
     if not os.path.exists(path):
         _create_tracking()
     return pandas.read_parquet(path)
+
+
+@functools.cache
+def _load_table(name: str) -> pandas.DataFrame:
+    table = pandas.read_csv(os.path.join(_CSV_DIR, f"{name}.csv"))
+    return table.drop(columns=[c for c in table.columns if c.startswith("Unnamed")])
+
+
+def load_plays() -> pandas.DataFrame:
+    """
+    Load the plays data. The csv is only parsed once per process, a copy is returned.
+    """
+    return _load_table("plays").copy()
+
+
+def load_players() -> pandas.DataFrame:
+    """
+    Load the players data. The csv is only parsed once per process, a copy is returned.
+    """
+    return _load_table("players").copy()
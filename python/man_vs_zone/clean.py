@@ -58,6 +58,32 @@ def zero_coords(tracking, plays):
     return tracking
 
 
+def closest_receivers(G, CBs, WRs):
+    """
+    Finds the closest receiver to each cornerback (cornerbacks without one are left out)
+    """
+
+    if len(CBs) == 0 or len(WRs) == 0:
+        return []
+
+    CB_xy = np.array([[G.nodes[CB]["x"], G.nodes[CB]["y"]] for CB in CBs], dtype=float)
+    WR_xy = np.array([[G.nodes[WR]["x"], G.nodes[WR]["y"]] for WR in WRs], dtype=float)
+
+    # distance between every cornerback and receiver at once
+    #       - missing positions are never the closest
+    dists = np.linalg.norm(CB_xy[:, np.newaxis, :] - WR_xy[np.newaxis, :, :], axis=-1)
+    dists[np.isnan(dists)] = np.inf
+
+    closest = np.argmin(dists, axis=1)
+    min_dists = dists[np.arange(len(CBs)), closest]
+
+    return [
+        (CB, WRs[i], dist)
+        for CB, i, dist in zip(CBs, closest, min_dists)
+        if dist < np.inf
+    ]
+
+
 def graph_one_play(tracking, gameId, playId, snap_type):
     """
     Creates a graph representation of a single play
@@ -80,23 +106,24 @@ def graph_one_play(tracking, gameId, playId, snap_type):
         begin = snap
         end = frame_count + 1
 
+    # split the play into its frames once rather than filtering the play for every frame
+    node_columns = ["nflId", "position_group", "club", "x", "y", "s", "a", "dir"]
+    play_frames = {
+        frame: temp
+        for frame, temp in play_data[["frameId"] + node_columns].groupby("frameId")
+    }
+
     for frame in range(begin, end):
-        temp = play_data.loc[play_data["frameId"] == frame]
+        temp = play_frames.get(frame, play_data.iloc[:0])
 
         G = nx.Graph()
 
-        for _, row in temp.iterrows():
-
-            G.add_node(
-                row["nflId"],
-                position=row["position_group"],
-                club=row["club"],
-                x=row["x"],
-                y=row["y"],
-                s=row["s"],
-                a=row["a"],
-                dir=row["dir"],
+        G.add_nodes_from(
+            (nflId, dict(position=position, club=club, x=x, y=y, s=s, a=a, dir=dir))
+            for nflId, position, club, x, y, s, a, dir in zip(
+                *(temp[column].tolist() for column in node_columns)
             )
+        )
 
         CBs = [
             nflId
@@ -109,20 +136,8 @@ def graph_one_play(tracking, gameId, playId, snap_type):
             for nflId, data in G.nodes(data=True)
             if data["position"] == "receiver"
         ]
-        closest_pairs = []
-
-        for CB in CBs:
-            min_dist = float("inf")
-            closest_WR = None
-            for WR in WRs:
-                dist = np.linalg.norm(
-                    np.array([G.nodes[CB]["x"], G.nodes[CB]["y"]])
-                    - np.array([G.nodes[WR]["x"], G.nodes[WR]["y"]])
-                )
-                if dist < min_dist:
-                    min_dist = dist
-                    closest_WR = WR
-            closest_pairs.append((CB, closest_WR, min_dist))
+
+        closest_pairs = closest_receivers(G, CBs, WRs)
 
         for CB, WR, dist in closest_pairs:
             G.add_edge(CB, WR, type="coverage", distance=dist)
@@ -42,9 +42,9 @@ def plot_routes(
     if not isinstance(tracking, pd.DataFrame):
         tracking = data.load_tracking(gid)
     if not isinstance(plays, pd.DataFrame):
-        plays = pd.read_csv("data/plays.csv")
+        plays = data.load_plays()
     if not isinstance(players, pd.DataFrame):
-        players = pd.read_csv("data/players.csv")
+        players = data.load_players()
 
     # get only the frames for this play
     this_game = tracking["gameId"] == gid